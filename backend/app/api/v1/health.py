@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import engine, pool_status
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/health", status_code=status.HTTP_200_OK)
+async def health():
+    return {"status": "ok", "db_pool": pool_status(engine)}
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
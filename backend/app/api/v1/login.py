@@ -2,9 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import authenticate_user, create_access_token
+from app.core.auth import authenticate_user, create_access_token, create_refresh_token, rotate_refresh_token
 from app.core.dependencies import get_db
-from app.schemas.token import Token
+from app.schemas.token import Token, TokenRefresh
 from app.schemas.user import UserOut
 
 router = APIRouter(tags=["Login"])
@@ -17,4 +17,12 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
     authd_user = UserOut.model_validate(user)
     token = create_access_token(data={"sub": authd_user.username})
-    return {"access_token": token, "token_type": "bearer"}
+    refresh_token = await create_refresh_token(db, authd_user.id, authd_user.username)
+    await db.commit()
+    return {"access_token": token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+@router.post("/token/refresh", response_model=Token)
+async def refresh(body: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    access_token, refresh_token = await rotate_refresh_token(db, body.refresh_token)
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
@@ -1,41 +1,396 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+from datetime import datetime
+from itertools import islice
+from typing import IO, AsyncIterator, Iterator, Optional, Tuple, Union
+
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.dependencies import get_current_user, get_db, verify_api_key
+from app.core.dependencies import get_current_user, get_read_db, get_write_db, release_connections, verify_api_key
+from app.core import events
+from app.core.config import settings
+from app.core.idempotency import IdempotentRequest, idempotent_request
+from app.core.etag import CACHE_CONTROL, etag_matches, make_etag, not_modified
+from app.core.pagination import decode_cursor, encode_cursor, expired_cursor_exception
+from app.core.serialization import parse_task_fields, task_json_response
 from app.crud import task as crud
+from app.crud.task_stats import get_task_stats
+from app.db.search import search_terms
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskOut, TaskStatusUpdate, TaskUpdate
+from app.schemas.task import (
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskChanges,
+    TaskCreate,
+    TaskExportFormat,
+    TaskImportError,
+    TaskImportResult,
+    TaskOut,
+    TaskSort,
+    TaskStatsOut,
+    TaskStatus,
+    TaskStatusUpdate,
+    TaskUpdate,
+)
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"], dependencies=[Depends(verify_api_key)])
 
+EXPORT_MEDIA_TYPES = {
+    TaskExportFormat.ndjson: "application/x-ndjson",
+    TaskExportFormat.csv: "text/csv",
+}
+EXPORT_COLUMNS = list(TaskOut.model_fields)
+IMPORT_REQUIRED_COLUMNS = [name for name, field in TaskCreate.model_fields.items() if field.is_required()]
+
 
 @router.post("/", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_in: TaskCreate,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
+    idempotent: IdempotentRequest = Depends(idempotent_request),
 ):
-    return await crud.create_task(db, user_id=user.id, task_data=task_in.model_dump())
+    if idempotent.replay:
+        return idempotent.replay
+    idempotent.respond_with(
+        lambda task: task_json_response(task, status_code=status.HTTP_201_CREATED), status.HTTP_201_CREATED
+    )
+    task = await crud.create_task(db, user_id=user.id, task_data=task_in.model_dump())
+    return idempotent.respond(task)
 
 
-@router.get("/", response_model=list[TaskOut], status_code=status.HTTP_200_OK)
+@router.post("/batch", response_model=TaskBatchResponse, status_code=status.HTTP_200_OK)
+async def batch_tasks(
+    batch: TaskBatchRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db),
+    idempotent: IdempotentRequest = Depends(idempotent_request),
+):
+    if idempotent.replay:
+        return idempotent.replay
+    idempotent.respond_with(lambda results: {"results": results})
+    results = await crud.apply_task_batch(db, user.id, batch.operations)
+    return idempotent.respond(results)
+
+
+@router.get(
+    "/",
+    response_model=list[TaskOut],
+    status_code=status.HTTP_200_OK,
+    responses={304: {"description": "Not modified since the `If-None-Match` ETag"}},
+)
 async def list_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of tasks to return"),
+    after: Optional[str] = Query(None, description="Cursor from the `X-Next-Cursor` header of the previous page"),
+    sort: TaskSort = Query(TaskSort.id, description="Sort order; prefix with `-` for descending"),
+    status_filter: Optional[TaskStatus] = Query(None, alias="status", description="Only return tasks in this status"),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
+    updated_after: Optional[datetime] = Query(None),
+    updated_before: Optional[datetime] = Query(None),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated task fields to return, e.g. `id,title,status`; only those columns are read",
+    ),
+    if_none_match: Optional[str] = Header(None),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    selected_fields = parse_task_fields(fields)
+    cursor = decode_cursor(after, sort.value) if after else None
+
+    # Any create/update/delete changes the count or the newest updated_at; the query string scopes it to this page
+    count, last_updated = await crud.get_task_list_version(db, user.id)
+    etag = make_etag("list", user.id, count, last_updated, request.url.query)
+    if etag_matches(if_none_match, etag):
+        await release_connections(db)
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    tasks = await crud.get_tasks_for_user(
+        db,
+        user.id,
+        limit=limit + 1,
+        after=cursor,
+        sort=sort,
+        status=status_filter,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        fields=selected_fields,
+    )
+    await release_connections(db)
+
+    # One extra row tells us whether another page exists without a COUNT query
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort.value, crud.sort_key(last, sort), last.id)
+    return task_json_response(tasks, response, fields=selected_fields)
+
+
+@router.get(
+    "/changes",
+    response_model=TaskChanges,
+    status_code=status.HTTP_200_OK,
+    responses={410: {"description": "`since` predates the retained deletion history; do a full sync"}},
+)
+async def task_changes(
+    since: Optional[str] = Query(None, description="`cursor` from the previous sync; omit for a full snapshot"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changes to return"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # The cursor holds the (change_seq, id) position reached and the change_seq the client is consistent with
+    after, synced = None, None
+    if since:
+        position, last_id = decode_cursor(since, "changes")
+        after, synced = (position[0], last_id), position[1]
+
+    upto, compacted_seq = await crud.get_change_marks(db, user.id)
+    if synced is not None and synced < compacted_seq:
+        await release_connections(db)
+        raise expired_cursor_exception
+    if synced is None:
+        # Full snapshot: deletions up to now don't concern a client that has nothing yet
+        synced = upto or 0
+    changes = await crud.get_task_changes(db, user.id, limit=limit + 1, after=after, synced=synced, upto=upto)
+    await release_connections(db)
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    seq, last_id = changes[-1][:2] if changes else (after or (upto or 0, 0))
+    # Once a sync has caught up, the client is consistent with everything up to `upto`
+    synced = upto if upto is not None and not has_more else max(synced, seq)
+    return {
+        "tasks": [task for _, _, task in changes if task is not None],
+        "deleted": [task_id for _, task_id, task in changes if task is None],
+        "cursor": encode_cursor("changes", [seq, synced], last_id),
+        "has_more": has_more,
+    }
+
+
+@router.get("/stats", response_model=TaskStatsOut, status_code=status.HTTP_200_OK)
+async def task_stats(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    counts = await get_task_stats(db, user.id)
+    await release_connections(db)
+    return {**counts, "total": sum(counts.values())}
+
+
+@router.get("/search", response_model=list[TaskOut], status_code=status.HTTP_200_OK)
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for in the title and description"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of tasks to return"),
+    after: Optional[str] = Query(None, description="Cursor from the `X-Next-Cursor` header of the previous page"),
+    status_filter: Optional[TaskStatus] = Query(None, alias="status", description="Only return tasks in this status"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    cursor = decode_cursor(after, "rank") if after else None
+
+    terms = search_terms(q)
+    if not terms:
+        await release_connections(db)
+        return task_json_response([], response)
+
+    matches = await crud.search_tasks(db, user.id, terms, limit=limit + 1, after=cursor, status=status_filter)
+    await release_connections(db)
+
+    if len(matches) > limit:
+        matches = matches[:limit]
+        last, rank = matches[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor("rank", rank, last.id)
+    return task_json_response([task for task, _ in matches], response)
+
+
+async def _export_rows(db: AsyncSession, user_id: int, fmt: TaskExportFormat, **filters) -> AsyncIterator[str]:
+    try:
+        if fmt == TaskExportFormat.csv:
+            yield ",".join(EXPORT_COLUMNS) + "\r\n"
+        async for batch in crud.stream_tasks_for_user(db, user_id, **filters):
+            rows = [TaskOut.model_validate(task) for task in batch]
+            if fmt == TaskExportFormat.csv:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([row.model_dump(mode="json")[column] for column in EXPORT_COLUMNS] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(row.model_dump_json() + "\n" for row in rows)
+    finally:
+        # The body is streamed after the request dependencies have exited; release the connection here
+        await release_connections(db)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+)
+async def export_tasks(
+    fmt: TaskExportFormat = Query(TaskExportFormat.ndjson, alias="format", description="`ndjson` or `csv`"),
+    status_filter: Optional[TaskStatus] = Query(None, alias="status", description="Only export tasks in this status"),
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return await crud.get_tasks_for_user(db, user.id)
+    return StreamingResponse(
+        _export_rows(db, user.id, fmt, status=status_filter),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{fmt.value}"'},
+    )
+
+
+ImportRow = Tuple[int, Union[TaskCreate, ValidationError]]
 
 
-@router.get("/{task_id}", response_model=TaskOut, status_code=status.HTTP_200_OK)
+def _csv_rows(text: IO[str]) -> Iterator[ImportRow]:
+    reader = csv.DictReader(text)
+    missing = [column for column in IMPORT_REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"CSV header is missing: {', '.join(missing)}"
+        )
+    for number, row in enumerate(reader, start=1):
+        # Extra cells (no header) are ignored, as are extra columns such as the id/created_at of an export
+        row.pop(None, None)
+        if not row.get("status"):
+            row.pop("status", None)
+        try:
+            yield number, TaskCreate.model_validate(row)
+        except ValidationError as exc:
+            yield number, exc
+
+
+def _ndjson_rows(text: IO[str]) -> Iterator[ImportRow]:
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, TaskCreate.model_validate_json(line)
+        except ValidationError as exc:
+            yield number, exc
+
+
+@router.post("/import", response_model=TaskImportResult, status_code=status.HTTP_200_OK)
+async def import_tasks(
+    file: UploadFile = File(..., description="CSV with a header row (title, description, status) or NDJSON"),
+    fmt: Optional[TaskExportFormat] = Query(
+        None, alias="format", description="`ndjson` or `csv`; by default taken from the file name"
+    ),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_write_db),
+):
+    """Create tasks from an uploaded file, validated and inserted `TSKZ_TASK_IMPORT_CHUNK_SIZE` rows at a time.
+
+    Each chunk is committed on its own, so memory stays flat however large the file is. Valid rows are created
+    even when others are rejected; an import publishes one `reset` event instead of an event per task.
+    """
+    if fmt is None:
+        fmt = TaskExportFormat.csv if (file.filename or "").lower().endswith(".csv") else TaskExportFormat.ndjson
+    # The upload is spooled to a temporary file by the form parser; read it back one chunk of rows at a time
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    rows = _csv_rows(text) if fmt == TaskExportFormat.csv else _ndjson_rows(text)
+    result = TaskImportResult(created=0, rejected=0, errors=[])
+    try:
+        while chunk := list(islice(rows, settings.TASK_IMPORT_CHUNK_SIZE)):
+            valid = []
+            for number, parsed in chunk:
+                if isinstance(parsed, TaskCreate):
+                    valid.append(parsed.model_dump())
+                    continue
+                result.rejected += 1
+                if len(result.errors) < settings.TASK_IMPORT_MAX_ERRORS:
+                    errors = parsed.errors(include_url=False, include_context=False, include_input=False)
+                    result.errors.append(TaskImportError(row=number, errors=errors))
+                else:
+                    result.errors_truncated = True
+            if valid:
+                result.created += await crud.import_tasks(db, user.id, valid)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File is not valid UTF-8; {result.created} tasks were imported before the error",
+        )
+    finally:
+        if result.created:
+            await events.publish_task_event(user.id, events.RESET, "{}")
+        # Leave closing the upload to FastAPI
+        text.detach()
+    return result
+
+
+async def _event_stream(user_id: int, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    # Subscribed when the body starts streaming, so a response that is never sent can't leak a subscription
+    subscription, missed = await events.broker.subscribe(user_id, last_event_id)
+    try:
+        # Reconnect delay for EventSource clients, then whatever the client missed while disconnected
+        yield "retry: 3000\n\n" + "".join(events.format_sse(event) for event in missed)
+        while True:
+            batch = await subscription.next_batch(settings.EVENTS_HEARTBEAT_SECONDS)
+            if batch:
+                yield "".join(events.format_sse(event) for event in batch)
+            elif subscription.overflowed:
+                # Fell too far behind: what was queued has been sent; end the stream and let the client resume
+                break
+            else:
+                # A comment line keeps proxies from closing an idle stream
+                yield ": heartbeat\n\n"
+    finally:
+        events.broker.unsubscribe(subscription)
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def task_events(
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    user: User = Depends(get_current_user),
+):
+    return StreamingResponse(
+        _event_stream(user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/{task_id}",
+    response_model=TaskOut,
+    status_code=status.HTTP_200_OK,
+    responses={304: {"description": "Not modified since the `If-None-Match` ETag"}},
+)
 async def get_task(
     task_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     task = await crud.get_task_by_id(db, task_id, user.id)
+    await release_connections(db)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task
+
+    etag = make_etag("task", task.id, task.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return task_json_response(task, response)
 
 
 @router.put("/{task_id}", response_model=TaskOut, status_code=status.HTTP_200_OK)
@@ -43,12 +398,16 @@ async def update_task(
     task_id: int,
     update: TaskUpdate,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
+    idempotent: IdempotentRequest = Depends(idempotent_request),
 ):
-    task = await crud.get_task_by_id(db, task_id, user.id)
+    if idempotent.replay:
+        return idempotent.replay
+    idempotent.respond_with(task_json_response)
+    task = await crud.update_task(db, task_id, user.id, update.model_dump())
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return await crud.update_task(db, task, update.model_dump())
+    return idempotent.respond(task)
 
 
 @router.patch("/{task_id}", response_model=TaskOut, status_code=status.HTTP_200_OK)
@@ -56,21 +415,28 @@ async def update_task_status(
     task_id: int,
     update: TaskStatusUpdate,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
+    idempotent: IdempotentRequest = Depends(idempotent_request),
 ):
-    task = await crud.get_task_by_id(db, task_id, user.id)
+    if idempotent.replay:
+        return idempotent.replay
+    idempotent.respond_with(task_json_response)
+    task = await crud.update_task_status(db, task_id, user.id, update.status)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return await crud.update_task_status(db, task, update.status)
+    return idempotent.respond(task)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: int,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
+    idempotent: IdempotentRequest = Depends(idempotent_request),
 ):
-    task = await crud.get_task_by_id(db, task_id, user.id)
-    if not task:
+    if idempotent.replay:
+        return idempotent.replay
+    idempotent.respond_with(lambda deleted: Response(status_code=status.HTTP_204_NO_CONTENT))
+    if not await crud.delete_task(db, task_id, user.id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    await crud.delete_task(db, task)
+    return idempotent.respond(True)
@@ -0,0 +1,116 @@
+import hashlib
+import math
+import time
+from collections import Counter
+from typing import Dict, Iterable, NamedTuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import shared
+from app.core.config import settings
+from app.db.session import ObservedQueuePool
+
+# ---------------------------- #
+# Rate Limits
+# ---------------------------- #
+# Token buckets in the shared store, so every worker draws on the same bucket. Each key costs one bucket entry,
+# which the store drops once the bucket has refilled, plus LRU eviction in the memory backend.
+# Scopes: `api_key` and `user` are checked by the auth dependencies, `auth_ip` by AdmissionMiddleware for the
+# bcrypt-heavy /token and /signup endpoints. The client IP is the peer address, or X-Forwarded-For when the peer is a
+# proxy listed in FORWARDED_ALLOW_IPS (uvicorn resolves it).
+AUTH_PATHS = {"/token", "/signup"}
+
+
+class RateLimit(NamedTuple):
+    rate: float  # tokens per second
+    burst: int  # bucket capacity
+
+
+def limit_for(scope: str) -> RateLimit:
+    # Read on every check so a settings change (or a test's monkeypatch) applies right away
+    if scope == "api_key":
+        return RateLimit(settings.RATE_LIMIT_API_KEY_PER_SECOND, settings.RATE_LIMIT_API_KEY_BURST)
+    if scope == "user":
+        return RateLimit(settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST)
+    return RateLimit(settings.RATE_LIMIT_AUTH_IP_PER_SECOND, settings.RATE_LIMIT_AUTH_IP_BURST)
+
+
+# Requests refused, by scope (`shed` for load shedding); exported in /metrics
+rejected_total: Counter = Counter()
+
+
+def rate_limit_headers(limit: RateLimit, tokens: float) -> Dict[str, str]:
+    """Headers of the IETF RateLimit draft plus Retry-After, for a request refused with `tokens` left."""
+    return {
+        "RateLimit-Limit": str(limit.burst),
+        "RateLimit-Remaining": str(int(tokens)),
+        "RateLimit-Reset": str(math.ceil((limit.burst - tokens) / limit.rate)),
+        "RateLimit-Policy": f"{limit.burst};w={math.ceil(limit.burst / limit.rate)}",
+        "Retry-After": str(max(1, math.ceil((1 - tokens) / limit.rate))),
+    }
+
+
+async def check_rate_limit(scope: str, identity: Union[int, str]) -> Dict[str, str]:
+    """Take a token from the caller's bucket; returns {} when allowed, otherwise the 429 headers."""
+    limit = limit_for(scope)
+    if not settings.RATE_LIMIT_ENABLED or not limit.rate:
+        return {}
+    allowed, tokens = await shared.store.take(f"ratelimit:{scope}:{identity}", limit.rate, limit.burst)
+    if allowed:
+        return {}
+    rejected_total[scope] += 1
+    return rate_limit_headers(limit, tokens)
+
+
+async def enforce_rate_limit(scope: str, identity: Union[int, str]) -> None:
+    headers = await check_rate_limit(scope, identity)
+    if headers:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests", headers=headers)
+
+
+def api_key_identity(api_key: str) -> str:
+    # Buckets are keyed by a digest so the shared store never holds the key itself
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+# ---------------------------- #
+# Load Shedding
+# ---------------------------- #
+# Requests that would only queue behind a saturated pool are refused early with 503 + Retry-After, which is cheaper
+# for everyone than letting them time out. Health checks and metrics are never shed.
+SHED_EXEMPT_PATHS = {"/health", "/metrics"}
+# Pool wait is averaged over windows of this many seconds
+POOL_WAIT_WINDOW_SECONDS = 1.0
+
+
+class PoolWaitMonitor:
+    """Average connection checkout wait over the last full window, across the given engines' pools."""
+
+    def __init__(self, engines: Iterable[AsyncEngine]):
+        pools = (engine.sync_engine.pool for engine in engines)
+        # Other pool classes (e.g. for in-memory SQLite) don't record waits
+        self.pools = [pool for pool in pools if isinstance(pool, ObservedQueuePool)]
+        self._window_start = time.monotonic()
+        self._checkouts, self._wait_total = self._totals()
+        self.average_wait = 0.0
+
+    def _totals(self):
+        return sum(pool.checkouts for pool in self.pools), sum(pool.wait_seconds_total for pool in self.pools)
+
+    def current(self) -> float:
+        now = time.monotonic()
+        if self.pools and now - self._window_start >= POOL_WAIT_WINDOW_SECONDS:
+            checkouts, wait_total = self._totals()
+            # No checkouts in the window means nobody waited; shedding stops once the pool drains
+            self.average_wait = (
+                (wait_total - self._wait_total) / (checkouts - self._checkouts) if checkouts > self._checkouts else 0.0
+            )
+            self._window_start, self._checkouts, self._wait_total = now, checkouts, wait_total
+        return self.average_wait
+
+
+def overloaded(in_flight: int, monitor: PoolWaitMonitor) -> bool:
+    if settings.SHED_MAX_IN_FLIGHT and in_flight > settings.SHED_MAX_IN_FLIGHT:
+        return True
+    return bool(settings.SHED_POOL_WAIT_SECONDS) and monitor.current() > settings.SHED_POOL_WAIT_SECONDS
@@ -1,12 +1,15 @@
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
 import jwt
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import LRUCache
 from app.core.config import settings
-from app.core.security import verify_password
+from app.core.security import verify_password_async
+from app.crud import refresh_token as crud_refresh
 from app.crud.user import get_user_by_username
 from app.models.user import User
 from app.schemas.token import TokenData
@@ -35,19 +38,86 @@ def verify_access_token(token: str):
     try:
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         username: str = payload.get("sub")
-        if not username:
+        if not username or payload.get("type") == REFRESH_TOKEN_TYPE:
             raise credential_exception
-        token_data = TokenData(username=username)
+        expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc) if "exp" in payload else None
+        token_data = TokenData(username=username, expires_at=expires_at)
         return token_data
     except Exception:
         raise credential_exception
 
 
+# ---------------------------- #
+# Refresh Token Rotation
+# ---------------------------- #
+REFRESH_TOKEN_TYPE = "refresh"
+
+refresh_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid or expired refresh token",
+    headers={
+        "WWW-AUTHENTICATE": "Bearer",
+    },
+)
+
+
+async def create_refresh_token(db: AsyncSession, user_id: int, username: str) -> str:
+    """Issue a single-use refresh token and record its id; the caller commits."""
+    jti = uuid.uuid4().hex
+    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_REFRESH_TOKEN_EXPIRE_MINUTES)
+    await crud_refresh.create_refresh_token(db, jti=jti, user_id=user_id, expires_at=expire)
+    to_encode = {"sub": username, "uid": user_id, "jti": jti, "type": REFRESH_TOKEN_TYPE, "exp": expire}
+    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[str, str]:
+    """Exchange a refresh token for a new access/refresh pair: one signature check and one UPDATE, no bcrypt.
+
+    Presenting an already-used token revokes every outstanding refresh token of its owner.
+    """
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        username, user_id, jti = payload["sub"], int(payload["uid"]), payload["jti"]
+        if payload.get("type") != REFRESH_TOKEN_TYPE:
+            raise ValueError("not a refresh token")
+    except Exception:
+        raise refresh_exception
+
+    if await crud_refresh.consume_refresh_token(db, jti) is None:
+        if await crud_refresh.get_refresh_token_owner(db, jti) is not None:
+            await crud_refresh.revoke_user_refresh_tokens(db, user_id)
+            await db.commit()
+        raise refresh_exception
+
+    await crud_refresh.delete_expired_refresh_tokens(db, user_id)
+    new_refresh_token = await create_refresh_token(db, user_id, username)
+    await db.commit()
+    return create_access_token(data={"sub": username}), new_refresh_token
+
+
+# ---------------------------- #
+# Authenticated Identity Cache
+# ---------------------------- #
+# Each worker keeps its own cache and nothing invalidates it, so a token keeps resolving to the user it was verified
+# for (even if that user changes or is removed) for up to AUTH_CACHE_TTL_SECONDS, or until the token expires.
+identity_cache: LRUCache[User] = LRUCache(max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def cache_identity(token: str, user: User, expires_at: Optional[datetime] = None) -> None:
+    # Never trust a cached token past its own expiry
+    ttl = None
+    if expires_at is not None:
+        ttl = (expires_at - datetime.now(timezone.utc)).total_seconds()
+    # Store a detached copy so the cached object never references a closed session
+    snapshot = User(id=user.id, username=user.username, hashed_password=user.hashed_password)
+    identity_cache.set(token, snapshot, ttl=ttl)
+
+
 # ---------------------------- #
 # User Authentication
 # ---------------------------- #
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     user = await get_user_by_username(db, username)
-    if user and verify_password(password, user.hashed_password):
+    if user and await verify_password_async(password, user.hashed_password):
         return user
     return None
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import AnyHttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,8 +12,6 @@ class Path(BaseSettings):
     STATIC_DIR: str = os.path.join(BASE_DIR, "static")
     TEMPLATES_DIR: str = os.path.join(BASE_DIR, "templates")
 
-    os.makedirs(DATA_DIR, exist_ok=True)
-
 
 path = Path()
 
@@ -21,22 +19,169 @@ path = Path()
 class Settings(BaseSettings):
     # Secret keys and API keys
     JWT_SECRET_KEY_LENGTH: int = 32  # Length of the JWT secret key
-    JWT_SECRET_KEY: str = Field(description="JWT secret key", default=os.urandom(JWT_SECRET_KEY_LENGTH).hex())
+    JWT_SECRET_KEY: str = Field(
+        description="JWT secret key; a random per-process key is generated when unset",
+        default_factory=lambda data: os.urandom(data["JWT_SECRET_KEY_LENGTH"]).hex(),
+    )
     JWT_ALGORITHM: str = Field("HS256", description="JWT algorithm for signing tokens")
-    JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(60 * 24 * 3, description="JWT token expiration time in minutes")
+    JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(
+        15, description="Access token expiration time in minutes; clients renew them at /token/refresh"
+    )
+    JWT_REFRESH_TOKEN_EXPIRE_MINUTES: int = Field(60 * 24 * 30, description="Refresh token expiration time in minutes")
     HTTP_API_KEY: str = Field("123456", description="HTTP API key for authentication")
 
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = Field(0, description="bcrypt threads per process; 0 picks min(4, CPUs / WORKERS)")
+    PASSWORD_HASH_QUEUE_DEPTH: int = Field(32, description="Hash jobs allowed to wait for a worker before 503")
+
+    # Authenticated identity cache (token -> user), per process
+    AUTH_CACHE_MAX_SIZE: int = Field(10_000, description="Maximum number of cached tokens; 0 disables the cache")
+    AUTH_CACHE_TTL_SECONDS: int = Field(
+        60,
+        description="Seconds a verified token is trusted without a DB lookup, per worker; changes to the user "
+        "(including deletion) can go unnoticed for this long",
+    )
+
     # CORS settings
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl | str] = Field(
         ["http://localhost:8000", "*"], description="List of allowed CORS origins for the backend"
     )
 
+    # Observability
+    METRICS_ENABLED: bool = Field(True, description="Record request/DB/hash timings and serve them at /metrics")
+
+    # Server-Sent Events change feed (/tasks/events)
+    EVENTS_BACKEND: Literal["memory", "sqlite"] = Field(
+        "memory", description="Event broker; `memory` only reaches clients of the same worker, `sqlite` reaches all"
+    )
+    EVENTS_HEARTBEAT_SECONDS: float = Field(
+        15.0, description="Send a comment line when a stream has been idle this long"
+    )
+    EVENTS_QUEUE_SIZE: int = Field(
+        256, description="Events buffered per connection; a client that falls further behind is disconnected"
+    )
+    EVENTS_REPLAY_SIZE: int = Field(500, description="Recent events kept per user for Last-Event-ID resume")
+    EVENTS_REPLAY_USERS: int = Field(10_000, description="Users whose recent events are kept for resume")
+    EVENTS_POLL_SECONDS: float = Field(0.1, description="How often the `sqlite` broker checks for new events")
+    EVENTS_RETENTION_SECONDS: int = Field(600, description="Events the `sqlite` broker keeps for Last-Event-ID resume")
+
+    # Delta sync (/tasks/changes)
+    TASK_TOMBSTONE_RETENTION_DAYS: int = Field(
+        30, description="Deleted-task tombstones older than this are compacted; older sync cursors get 410"
+    )
+
+    # Bulk import (/tasks/import)
+    TASK_IMPORT_CHUNK_SIZE: int = Field(1000, description="Rows validated, inserted and committed together")
+    TASK_IMPORT_MAX_ERRORS: int = Field(100, description="Rejected rows reported individually per import")
+
+    # Idempotency-Key support on task writes
+    IDEMPOTENCY_TTL_SECONDS: int = Field(24 * 60 * 60, description="How long a key's stored response is replayed")
+    IDEMPOTENCY_WAIT_SECONDS: float = Field(
+        10.0, description="A duplicate waits this long for the first request before getting 409"
+    )
+    IDEMPOTENCY_LOCK_SECONDS: int = Field(
+        60, description="An unfinished request older than this is presumed dead and its key can be reused"
+    )
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = Field(10_000, description="Finished responses cached in memory per process")
+
+    # Admission control: token-bucket rate limits (shared between workers via SHARED_STATE_BACKEND); rate 0 is off
+    RATE_LIMIT_ENABLED: bool = Field(True, description="Apply the RATE_LIMIT_* token buckets below")
+    RATE_LIMIT_API_KEY_PER_SECOND: float = Field(
+        0.0, description="Sustained requests per second per API key; with the one shared HTTP_API_KEY a global cap"
+    )
+    RATE_LIMIT_API_KEY_BURST: int = Field(1000, description="Requests an API key may burst above its rate")
+    RATE_LIMIT_USER_PER_SECOND: float = Field(20.0, description="Sustained requests per second per user")
+    RATE_LIMIT_USER_BURST: int = Field(60, description="Requests a user may burst above their rate")
+    RATE_LIMIT_AUTH_IP_PER_SECOND: float = Field(
+        0.5, description="POST /token and /signup per second per client IP (see FORWARDED_ALLOW_IPS behind a proxy)"
+    )
+    RATE_LIMIT_AUTH_IP_BURST: int = Field(10, description="Logins/signups a client IP may burst")
+
+    # Admission control: load shedding (503 + Retry-After)
+    SHED_MAX_IN_FLIGHT: int = Field(512, description="Shed requests beyond this many in flight per worker; 0 never")
+    SHED_POOL_WAIT_SECONDS: float = Field(
+        0.5, description="Shed while the average DB pool checkout wait over the last second exceeds this; 0 never"
+    )
+    SHED_RETRY_AFTER_SECONDS: int = Field(1, description="Retry-After sent with shed requests")
+
+    # Response compression
+    GZIP_ENABLED: bool = Field(True, description="Gzip responses for clients that send Accept-Encoding: gzip")
+    GZIP_MINIMUM_SIZE: int = Field(1024, description="Responses smaller than this many bytes are sent uncompressed")
+    GZIP_COMPRESS_LEVEL: int = Field(5, ge=1, le=9, description="zlib level; higher is smaller but costs more CPU")
+
+    # Serialization settings
+    FAST_JSON_RESPONSES: bool = Field(
+        True, description="Encode task responses directly with pydantic-core instead of via response_model"
+    )
+
     # Database settings
     DATABASE_URL: str = Field("sqlite+aiosqlite:///./data/taskaza.db", description="Database connection URL")
+    READ_DATABASE_URL: Optional[str] = Field(None, description="Optional read-replica URL for task and user reads")
+    READ_YOUR_WRITES_SECONDS: float = Field(
+        5.0, description="After a user's write, route their reads to the primary for this long"
+    )
+
+    # Worker processes (see app.serve)
+    WORKERS: int = Field(1, description="Server processes; more than 1 needs a fixed JWT_SECRET_KEY and shared state")
+    SHARED_STATE_BACKEND: Literal["memory", "sqlite"] = Field(
+        "memory", description="Store for state every worker must agree on; `memory` is per process"
+    )
+    SHARED_STATE_PATH: str = Field(
+        "./data/shared-state.db", description="SQLite file used by the `sqlite` shared state and event backends"
+    )
+    FORWARDED_ALLOW_IPS: str = Field(
+        "127.0.0.1",
+        description="Comma-separated proxy addresses (or *) trusted to set the client IP through X-Forwarded-For",
+    )
+
+    # Startup
+    DB_SCHEMA_SYNC: Literal["auto", "always", "never"] = Field(
+        "auto",
+        description="On startup: `auto` runs DDL only when the stored schema fingerprint differs, `always` runs it "
+        "every time, `never` leaves the schema to external migrations",
+    )
+    OPENAPI_CACHE_PATH: Optional[str] = Field(
+        None, description="Serve the OpenAPI document from this JSON file (see app.scripts.openapi) if it exists"
+    )
+
+    # Connection pool settings (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = Field(5, description="Connections kept open in the pool")
+    DB_MAX_OVERFLOW: int = Field(10, description="Extra connections allowed above DB_POOL_SIZE under load")
+    DB_POOL_TIMEOUT: float = Field(30.0, description="Seconds to wait for a free connection before erroring")
+    DB_POOL_RECYCLE: int = Field(1800, description="Replace connections older than this many seconds; -1 never")
+    DB_POOL_PRE_PING: bool = Field(
+        True,
+        description="Ping on every checkout; set false to rely on optimistic disconnect handling and DB_POOL_RECYCLE",
+    )
+    DB_STATEMENT_CACHE_SIZE: int = Field(
+        100, description="asyncpg prepared-statement cache size per connection; 0 for PgBouncer transaction mode"
+    )
+
+    # SQLite tuning profile, applied to every new connection when DATABASE_URL is SQLite
+    SQLITE_TUNING: bool = Field(True, description="Apply the SQLITE_* pragmas below on connect")
+    SQLITE_JOURNAL_MODE: str = Field("WAL", description="WAL lets readers run concurrently with a writer")
+    SQLITE_SYNCHRONOUS: str = Field("NORMAL", description="NORMAL is durable across app crashes in WAL mode")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(5000, description="Wait this long for a lock instead of failing")
+    SQLITE_MMAP_SIZE: int = Field(256 * 1024 * 1024, description="Bytes of the database file to memory-map")
+    SQLITE_CACHE_SIZE: int = Field(-64 * 1024, description="Page cache size; negative values are KiB")
+    SQLITE_TEMP_STORE: str = Field("MEMORY", description="Where temporary tables and indices are kept")
 
     # Configuration for Pydantic settings
     model_config = SettingsConfigDict(env_prefix="TSKZ_", env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
+    def multi_worker_problems(self) -> List[str]:
+        """Reasons these settings can't be shared by several worker processes (empty when they can)."""
+        if self.WORKERS <= 1:
+            return []
+        problems = []
+        if "JWT_SECRET_KEY" not in self.model_fields_set:
+            problems.append("TSKZ_JWT_SECRET_KEY is unset, so each worker would sign tokens with its own random key")
+        if self.SHARED_STATE_BACKEND == "memory":
+            problems.append("TSKZ_SHARED_STATE_BACKEND=memory keeps read-your-writes routing per worker")
+        if self.EVENTS_BACKEND == "memory":
+            problems.append("TSKZ_EVENTS_BACKEND=memory only delivers events to clients of the writing worker")
+        return problems
+
 
 settings = Settings()
 
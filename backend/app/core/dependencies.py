@@ -4,9 +4,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.auth import verify_access_token
+from app.core import shared
+from app.core.admission import api_key_identity, enforce_rate_limit
+from app.core.auth import cache_identity, identity_cache, verify_access_token
 from app.core.config import settings
 from app.crud.user import get_user_by_username
+from app.db import session as db_session
 from app.db.session import async_session
 from app.models.user import User
 
@@ -22,26 +25,87 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_replica_db(db: AsyncSession = Depends(get_db)) -> AsyncGenerator[AsyncSession, None]:
+    """Session on the read replica, or the primary session when no replica is configured."""
+    if db_session.async_read_session is None:
+        yield db
+        return
+    async with db_session.async_read_session() as session:
+        yield session
+
+
+async def release_connections(*sessions: AsyncSession) -> None:
+    """End each session's transaction and return its connection to the pool; loaded objects stay usable."""
+    for session in dict.fromkeys(sessions):
+        await session.close()
+
+
+def recent_writer_key(user_id: int) -> str:
+    """Shared-store key marking a user who wrote recently; their reads use the primary until the replica catches up."""
+    return f"recent-writer:{user_id}"
+
+
 # ---------------------------- #
 # Dependency: API Key Check
 # ---------------------------- #
-def verify_api_key(x_api_key: str = Depends(api_key_header)):
+async def verify_api_key(x_api_key: str = Depends(api_key_header)):
     if not x_api_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="API Key header missing")
     if x_api_key != settings.HTTP_API_KEY:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid API Key")
+    await enforce_rate_limit("api_key", api_key_identity(x_api_key))
     return x_api_key
 
 
 # ---------------------------- #
 # Dependency: Get Current User
 # ---------------------------- #
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_replica_db),
+) -> User:
+    cached = identity_cache.get(token)
+    if cached is not None:
+        await enforce_rate_limit("user", cached.id)
+        return cached
+
     token_data = verify_access_token(token)
-    user = await get_user_by_username(db, token_data.username)
+    user = await get_user_by_username(read_db, token_data.username)
+    if not user and read_db is not db:
+        # A user who just signed up may not have reached the replica yet
+        user = await get_user_by_username(db, token_data.username)
+    # Hand the connection back now instead of holding it for the rest of the request; sessions reconnect lazily
+    await release_connections(read_db, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
+    cache_identity(token, user, token_data.expires_at)
+    await enforce_rate_limit("user", user.id)
     return user
+
+
+# ---------------------------- #
+# Dependency: Read / Write Sessions
+# ---------------------------- #
+async def get_read_db(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_replica_db),
+) -> AsyncSession:
+    # Read-your-writes: stick to the primary for a short window after this user's last write
+    if db_session.async_read_session is None or await shared.store.get(recent_writer_key(user.id)):
+        return db
+    return read_db
+
+
+async def get_write_db(
+    user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    try:
+        yield db
+    finally:
+        if db_session.async_read_session is not None:
+            await shared.store.set(recent_writer_key(user.id), "1", settings.READ_YOUR_WRITES_SECONDS)
@@ -0,0 +1,27 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response, status
+
+# ---------------------------- #
+# Conditional GET (ETag / If-None-Match)
+# ---------------------------- #
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values that identify a representation's version."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison function, so W/ prefixes are ignored
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,316 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.shared import SQLiteFile
+
+# ---------------------------- #
+# Task Change Events
+# ---------------------------- #
+# Events are (id, type, data) with `data` already encoded as JSON, so a write is serialized once however many
+# connections receive it. Ids increase monotonically and start from the wall clock, so ids handed out before a
+# restart are always lower than the new process's ids.
+Event = Tuple[int, str, str]
+
+TASK_CREATED = "task.created"
+TASK_UPDATED = "task.updated"
+TASK_DELETED = "task.deleted"
+# Sent instead of a replay when events after the client's Last-Event-ID are no longer available
+RESET = "reset"
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One connection's pending events, bounded so a slow client can't make the server buffer without limit."""
+
+    def __init__(self, user_id: int, max_pending: int):
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.pending: Deque[Event] = deque()
+        self.overflowed = False
+        # Events up to this id were already handed to the connection (e.g. as its replay) and are skipped
+        self.delivered_up_to = 0
+        self._ready = asyncio.Event()
+
+    def skip_up_to(self, event_id: int) -> None:
+        """Skip events up to `event_id` from now on, including any already queued."""
+        self.delivered_up_to = event_id
+        self.pending = deque(event for event in self.pending if event[0] > event_id)
+
+    def push(self, event: Event) -> None:
+        if self.overflowed or event[0] <= self.delivered_up_to:
+            return
+        if len(self.pending) >= self.max_pending:
+            # Don't block the writer or grow the buffer: end this stream; the client resumes from Last-Event-ID
+            self.overflowed = True
+        else:
+            self.pending.append(event)
+        self._ready.set()
+
+    async def next_batch(self, timeout: float) -> List[Event]:
+        """Everything queued so far, waiting up to `timeout` seconds for something to arrive ([] on timeout)."""
+        if not self.pending and not self.overflowed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._ready.clear()
+        batch = list(self.pending)
+        self.pending.clear()
+        return batch
+
+
+class EventBroker(ABC):
+    """Fans task events out to the owner's open connections. Subclass for a backend shared between workers."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+
+    @abstractmethod
+    async def publish(self, user_id: int, event_type: str, data: str) -> None:
+        """Deliver an event to `user_id`'s connections, on every worker the backend reaches."""
+
+    @abstractmethod
+    async def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Event]]:
+        """Register a connection; also returns the events it missed after `last_event_id` (or a single reset)."""
+
+    def _add_subscription(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def _deliver(self, user_id: int, event: Event) -> None:
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.push(event)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {"subscribers": sum(len(subs) for subs in self._subscribers.values())}
+
+
+class _History:
+    def __init__(self, max_events: int):
+        self.events: Deque[Event] = deque(maxlen=max_events)
+        # Highest event id that has fallen out of `events`
+        self.dropped_up_to = 0
+
+
+class InMemoryBroker(EventBroker):
+    """Per-process broker: only sees writes handled by this worker. Safe because it runs on the event loop only."""
+
+    def __init__(
+        self,
+        queue_size: int = settings.EVENTS_QUEUE_SIZE,
+        replay_size: int = settings.EVENTS_REPLAY_SIZE,
+        max_users: int = settings.EVENTS_REPLAY_USERS,
+    ):
+        super().__init__(queue_size)
+        self.replay_size = replay_size
+        self.max_users = max_users
+        self.first_id = time.time_ns() // 1000
+        self.last_id = self.first_id - 1
+        self._history: "OrderedDict[int, _History]" = OrderedDict()
+        # Highest event id among users whose history was evicted entirely
+        self._forgotten_up_to = 0
+
+    async def publish(self, user_id: int, event_type: str, data: str) -> None:
+        self.last_id += 1
+        event = (self.last_id, event_type, data)
+
+        history = self._history.get(user_id)
+        if history is None:
+            history = self._history[user_id] = _History(self.replay_size)
+            while len(self._history) > self.max_users:
+                _, evicted = self._history.popitem(last=False)
+                if evicted.events:
+                    self._forgotten_up_to = max(self._forgotten_up_to, evicted.events[-1][0])
+        self._history.move_to_end(user_id)
+        if len(history.events) == history.events.maxlen:
+            history.dropped_up_to = history.events[0][0]
+        history.events.append(event)
+        self._deliver(user_id, event)
+
+    async def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Event]]:
+        return self._add_subscription(user_id), self._missed(user_id, last_event_id)
+
+    def _missed(self, user_id: int, last_event_id: Optional[int]) -> List[Event]:
+        if last_event_id is None:
+            return []
+        history = self._history.get(user_id)
+        gap = last_event_id < self.first_id - 1 or last_event_id > self.last_id
+        if history is None:
+            gap = gap or last_event_id < self._forgotten_up_to
+        else:
+            gap = gap or last_event_id < history.dropped_up_to
+        if gap:
+            return [(self.last_id, RESET, "{}")]
+        return [event for event in history.events if event[0] > last_event_id] if history else []
+
+
+class SQLiteBroker(EventBroker):
+    """Broker shared by every worker on the box through a local SQLite file.
+
+    Writers append to the `events` table; each worker with open streams tails it every `poll_interval` seconds and
+    fans new rows out to its own connections, so clients see events in id order whichever worker handled the write.
+    The table doubles as the replay log for Last-Event-ID and is pruned by age.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_events_user_id_id ON events (user_id, id);
+    CREATE TABLE IF NOT EXISTS event_marks (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    """
+    # Old events are pruned every this many publishes (per worker); rows read per poll query
+    PRUNE_EVERY = 1000
+    POLL_BATCH = 1000
+
+    def __init__(
+        self,
+        path: str = settings.SHARED_STATE_PATH,
+        queue_size: int = settings.EVENTS_QUEUE_SIZE,
+        replay_size: int = settings.EVENTS_REPLAY_SIZE,
+        retention: float = settings.EVENTS_RETENTION_SECONDS,
+        poll_interval: float = settings.EVENTS_POLL_SECONDS,
+    ):
+        super().__init__(queue_size)
+        self.file = SQLiteFile(path, self.SCHEMA)
+        self.replay_size = replay_size
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self._published = 0
+        self._last_seen = 0
+        self._poller: Optional[asyncio.Task] = None
+
+    async def publish(self, user_id: int, event_type: str, data: str) -> None:
+        await self.file.run(
+            lambda connection: connection.execute(
+                "INSERT INTO events (user_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, event_type, data, time.time()),
+            )
+        )
+        self._published += 1
+        if self._published % self.PRUNE_EVERY == 0:
+            await self.prune()
+
+    async def prune(self) -> None:
+        """Drop events older than the retention window, remembering the highest id dropped."""
+        await self.file.run(self._prune)
+
+    def _prune(self, connection: sqlite3.Connection) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (pruned_up_to,) = connection.execute(
+                "SELECT max(id) FROM events WHERE created_at < ?", (time.time() - self.retention,)
+            ).fetchone()
+            if pruned_up_to is not None:
+                connection.execute("DELETE FROM events WHERE id <= ?", (pruned_up_to,))
+                connection.execute(
+                    "INSERT INTO event_marks (name, value) VALUES ('pruned_up_to', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = max(value, excluded.value)",
+                    (pruned_up_to,),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Event]]:
+        # Subscribed before reading, so nothing published meanwhile can fall between the replay and the live events
+        subscription = self._add_subscription(user_id)
+        try:
+            last_id, missed = await self.file.run(lambda connection: self._missed(connection, user_id, last_event_id))
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        # Rows up to `last_id` are covered by the replay; the poller may have delivered some of them already, or still
+        # be behind and deliver them again
+        subscription.skip_up_to(last_id)
+        if self._poller is None:
+            # Nobody was listening, so there is nothing older to deliver. A poller that died instead keeps its place:
+            # the connections it served still need everything after it
+            self._last_seen = last_id
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return subscription, missed
+
+    def _missed(
+        self, connection: sqlite3.Connection, user_id: int, last_event_id: Optional[int]
+    ) -> Tuple[int, List[Event]]:
+        """The newest event id and the events `user_id` missed after `last_event_id`."""
+        (last_id,) = connection.execute("SELECT coalesce(max(id), 0) FROM events").fetchone()
+        if last_event_id is None:
+            return last_id, []
+        row = connection.execute("SELECT value FROM event_marks WHERE name = 'pruned_up_to'").fetchone()
+        events = connection.execute(
+            "SELECT id, type, data FROM events WHERE user_id = ? AND id > ? AND id <= ? ORDER BY id LIMIT ?",
+            (user_id, last_event_id, last_id, self.replay_size + 1),
+        ).fetchall()
+        if last_event_id > last_id or last_event_id < (row[0] if row else 0) or len(events) > self.replay_size:
+            return last_id, [(last_id, RESET, "{}")]
+        return last_id, [tuple(event) for event in events]
+
+    async def _poll(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception:
+                # e.g. the file is briefly locked or unreadable: keep the streams open and catch up on the next poll
+                logger.exception("Could not poll for task events")
+        self._poller = None
+
+    async def poll(self) -> None:
+        """Deliver every event written (by any worker) since the last poll to this worker's connections."""
+        while True:
+            last_seen = self._last_seen
+            rows = await self.file.run(
+                lambda connection: connection.execute(
+                    "SELECT id, user_id, type, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_seen, self.POLL_BATCH),
+                ).fetchall()
+            )
+            for event_id, user_id, event_type, data in rows:
+                self._deliver(user_id, (event_id, event_type, data))
+                self._last_seen = event_id
+            if len(rows) < self.POLL_BATCH:
+                return
+
+
+BROKERS = {"memory": InMemoryBroker, "sqlite": SQLiteBroker}
+broker: EventBroker = BROKERS[settings.EVENTS_BACKEND]()
+
+
+async def publish_task_event(user_id: int, event_type: str, data: str) -> None:
+    """Notify the owner's open streams; never raises.
+
+    It runs after the write has committed, and a lost notification only means clients pick the change up on their
+    next sync, so a broker error is logged instead of failing the request.
+    """
+    try:
+        await broker.publish(user_id, event_type, data)
+    except Exception:
+        logger.exception("Could not publish %s event for user %s", event_type, user_id)
+
+
+def format_sse(event: Event) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
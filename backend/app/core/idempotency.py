@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.dependencies import get_current_user, get_db
+from app.core.serialization import JSONBytesResponse, dump_tasks_json
+from app.crud.idempotency_key import (
+    claim_idempotency_key,
+    complete_idempotency_key,
+    get_idempotency_key,
+    purge_idempotency_keys,
+    release_idempotency_key,
+    take_over_idempotency_key,
+)
+from app.crud.task import BEFORE_COMMIT
+from app.models.task import Task
+from app.models.user import User
+
+# ---------------------------- #
+# Idempotency-Key Support
+# ---------------------------- #
+# A write sent with an `Idempotency-Key` header runs once per (user, key): the response is stored in the
+# idempotency_keys table and replayed for retries until the key expires. A retry that arrives while the first request
+# is still running waits for it. Finished responses are also kept in a per-process front cache, so most replays
+# don't touch the database.
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# How often a waiting duplicate re-checks a key held by another worker
+POLL_SECONDS = 0.05
+# Expired keys are purged every this many claims (per process)
+PURGE_EVERY = 1000
+
+idempotency_mismatch_exception = HTTPException(
+    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+    detail="Idempotency-Key was already used for a different request",
+)
+idempotency_in_progress_exception = HTTPException(
+    status_code=status.HTTP_409_CONFLICT,
+    detail="A request with this Idempotency-Key is still being processed",
+    headers={"Retry-After": "1"},
+)
+
+# (user id, key) -> (fingerprint, status code, media type, body)
+StoredResponse = Tuple[str, int, Optional[str], bytes]
+response_cache: LRUCache[StoredResponse] = LRUCache(
+    max_size=settings.IDEMPOTENCY_CACHE_MAX_SIZE, ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
+# Keys being processed by this worker; set when the request finishes so local duplicates wake up right away
+_in_flight: Dict[Tuple[int, str], asyncio.Event] = {}
+_claims = 0
+
+
+class IdempotentRequest:
+    """What the route needs: a stored response to `replay`, or `respond_with` then `respond` to produce one.
+
+    With an Idempotency-Key, the response is stored by the task write itself, in the transaction that commits it, so
+    a request that fails after its write committed still replays rather than writing twice.
+    """
+
+    def __init__(
+        self,
+        db: Optional[AsyncSession] = None,
+        user_id: Optional[int] = None,
+        key: Optional[str] = None,
+        fingerprint: Optional[str] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.key = key
+        self.fingerprint = fingerprint
+        self.replay: Optional[Response] = None
+        self.completed = False
+        self._make_response: Callable[[Any], Any] = lambda result: result
+        self._status_code = status.HTTP_200_OK
+        self._stored: Optional[Response] = None
+
+    def respond_with(self, make_response: Callable[[Any], Any], status_code: int = status.HTTP_200_OK) -> None:
+        """Turn the next task write's result into the route's response, storing it as part of that write."""
+        self._make_response = make_response
+        self._status_code = status_code
+        if self.key is not None:
+            self.db.info[BEFORE_COMMIT] = self._store
+
+    async def _store(self, result: Any) -> None:
+        response = self._make_response(result)
+        if not isinstance(response, Response):
+            # response_model would otherwise encode it after the route returns, too late to store
+            body = dump_tasks_json(response) if isinstance(response, Task) else to_json(response)
+            response = JSONBytesResponse(body, status_code=self._status_code)
+        await complete_idempotency_key(
+            self.db, self.user_id, self.key, response.status_code, response.media_type, response.body
+        )
+        self._stored = response
+
+    def respond(self, result: Any) -> Any:
+        """The response for the committed write's `result`."""
+        if self._stored is None:
+            return self._make_response(result)
+        response_cache.set(
+            (self.user_id, self.key),
+            (self.fingerprint, self._stored.status_code, self._stored.media_type, self._stored.body),
+        )
+        self.completed = True
+        return self._stored
+
+
+def _replay(stored: StoredResponse, fingerprint: str) -> Response:
+    stored_fingerprint, status_code, media_type, body = stored
+    if stored_fingerprint != fingerprint:
+        raise idempotency_mismatch_exception
+    return Response(body, status_code=status_code, media_type=media_type, headers={REPLAYED_HEADER: "true"})
+
+
+async def _claim(request: IdempotentRequest) -> Optional[Response]:
+    """Take the key for this request (None), or return the stored response, waiting while another request runs."""
+    global _claims
+    db, user_id, key, fingerprint = request.db, request.user_id, request.key, request.fingerprint
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        cached = response_cache.get((user_id, key))
+        if cached is not None:
+            return _replay(cached, fingerprint)
+
+        now = datetime.now(timezone.utc)
+        if await claim_idempotency_key(db, user_id, key, fingerprint, now):
+            _claims += 1
+            if _claims % PURGE_EVERY == 0:
+                await purge_idempotency_keys(db, now)
+            return None
+
+        row = await get_idempotency_key(db, user_id, key, now)
+        await db.rollback()
+        if row is None:
+            # Released by a failed request in the meantime; try to claim it again
+            continue
+        if row.expired or (row.status_code is None and row.lock_expired):
+            if await take_over_idempotency_key(db, user_id, key, fingerprint, now):
+                return None
+            continue
+        if row.status_code is not None:
+            stored = (row.fingerprint, row.status_code, row.media_type, row.body)
+            response_cache.set((user_id, key), stored)
+            return _replay(stored, fingerprint)
+        if row.fingerprint != fingerprint:
+            raise idempotency_mismatch_exception
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise idempotency_in_progress_exception
+        done = _in_flight.get((user_id, key))
+        try:
+            await asyncio.wait_for(done.wait() if done else asyncio.sleep(POLL_SECONDS), min(POLL_SECONDS, remaining))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def idempotent_request(
+    request: Request,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias=IDEMPOTENCY_HEADER,
+        min_length=1,
+        max_length=255,
+        description="Unique per write; a retry with the same key replays the first response instead of writing again",
+    ),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> AsyncGenerator[IdempotentRequest, None]:
+    if idempotency_key is None:
+        yield IdempotentRequest()
+        return
+
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(await request.body())
+    idempotent = IdempotentRequest(db, user.id, idempotency_key, digest.hexdigest())
+    idempotent.replay = await _claim(idempotent)
+    if idempotent.replay is not None:
+        yield idempotent
+        return
+
+    done = _in_flight[(user.id, idempotency_key)] = asyncio.Event()
+    try:
+        yield idempotent
+    finally:
+        _in_flight.pop((user.id, idempotency_key), None)
+        db.info.pop(BEFORE_COMMIT, None)
+        if not idempotent.completed:
+            # The write failed or raised (e.g. 404): let a retry run it again. A key whose response was committed
+            # with the write is kept, even if the request failed after that
+            await db.rollback()
+            await release_idempotency_key(db, user.id, idempotency_key)
+        done.set()
@@ -28,6 +28,17 @@ To authorize via Swagger UI:
 
 Once authorized, you’ll be able to call the protected `/tasks/*` endpoints.
 
+### 3️⃣ Refresh Your Token
+
+Access tokens expire after 15 minutes. `/token` also returns a single-use `refresh_token`. Exchange it at
+`/token/refresh` for a new access token (and a new refresh token) without sending the password again:
+
+```json
+{
+  "refresh_token": "<refresh_token>"
+}
+```
+
 ## 📦 Task Operations Overview
 
 All `/tasks/*` routes require both a valid JWT token and the `X-API-Key` header.
@@ -47,7 +58,63 @@ Send a `POST` request to `/tasks/` with:
 ### 📋 List All Tasks
 
 Send a `GET` request to `/tasks/`
-Returns all tasks belonging to the authenticated user.
+Returns tasks belonging to the authenticated user, one page at a time.
+
+* `limit` (default `100`, max `1000`) caps the page size
+* `after` takes the `X-Next-Cursor` response header of the previous page; the header is absent on the last page
+* `sort` is one of `id`, `created_at`, `updated_at` (prefix with `-` for descending)
+* `status`, `created_after`, `created_before`, `updated_after`, `updated_before` filter the results
+* `fields` (e.g. `id,title,status`) returns only those fields of each task
+
+`GET /tasks/` and `GET /tasks/{id}` return an `ETag` header. Send it back as `If-None-Match` when polling and you
+get an empty `304 Not Modified` until something changes.
+
+### 🔄 Delta Sync
+
+Send a `GET` request to `/tasks/changes` for a full snapshot, then to `/tasks/changes?since=<cursor>` with the
+`cursor` from the previous response to receive only `tasks` created or updated since then and the ids of
+`deleted` tasks. Repeat while `has_more` is `true`. `410 Gone` means the cursor is too old: sync again without
+`since`.
+
+### 📡 Live Task Events
+
+Open `GET /tasks/events` as a Server-Sent Events stream to receive `task.created`, `task.updated` and
+`task.deleted` events as they happen instead of polling `GET /tasks/`. Send `Last-Event-ID` when reconnecting to
+replay missed events; a `reset` event means you should refetch the list.
+
+### 🔂 Safe Retries
+
+Send an `Idempotency-Key` header (e.g. a UUID) with any task write. A retry with the same key gets the first
+response back, marked `Idempotent-Replayed: true`, and the write doesn't happen twice. Reusing a key for a different
+request returns `422`.
+
+### 🚦 Rate Limits
+
+Requests are limited per user and, on `/token` and `/signup`, per client IP. Over the limit you get
+`429 Too Many Requests`; wait for `Retry-After` seconds (see also the `RateLimit-*` headers). A `503` with
+`Retry-After` means the server is shedding load: retry later.
+
+### 📊 Task Counts
+
+Send a `GET` request to `/tasks/stats`
+Returns the number of `pending` and `completed` tasks and the `total`, without listing them.
+
+### 🔍 Search Tasks
+
+Send a `GET` request to `/tasks/search?q=groceries`
+Returns tasks whose title or description contains every word of `q`, best match first (title matches rank higher).
+Paged like `GET /tasks/`: `limit` (default `20`, max `100`), `after` from `X-Next-Cursor`, and an optional `status`.
+
+### 📤 Export All Tasks
+
+Send a `GET` request to `/tasks/export?format=ndjson` (or `format=csv`)
+Streams every task belonging to the authenticated user, one row per line.
+
+### 📥 Import Tasks
+
+Send a `POST` request to `/tasks/import` with a multipart `file`: CSV with a `title,description,status` header or
+NDJSON. Returns the `created` and `rejected` counts and the validation `errors` of rejected rows. Valid rows are
+created even when others are rejected.
 
 ### 🔁 Update a Task (Full Update)
 
@@ -71,6 +138,23 @@ Send a `PATCH` request to `/tasks/{id}` with:
 }
 ```
 
+### 📦 Apply Many Changes at Once
+
+Send a `POST` request to `/tasks/batch` with a list of operations:
+
+```json
+{
+  "operations": [
+    {"op": "create", "task": {"title": "New", "description": "Created in a batch"}},
+    {"op": "status", "id": 1, "status": "completed"},
+    {"op": "update", "id": 2, "task": {"title": "Renamed", "description": "New details"}},
+    {"op": "delete", "id": 3}
+  ]
+}
+```
+
+Operations are applied in order inside one transaction. Each gets its own result (`201`, `200`, `204` or `404`).
+
 ### Delete a Task
 
 Send a `DELETE` request to `/tasks/{id}`
@@ -94,4 +178,5 @@ tags_metadata = [
     {"name": "Users", "description": "User registration and login routes"},
     {"name": "Login", "description": "Authentication and token management routes"},
     {"name": "Tasks", "description": "CRUD operations for user tasks"},
+    {"name": "Health", "description": "Liveness and connection pool status"},
 ]
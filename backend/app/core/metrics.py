@@ -0,0 +1,201 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# ---------------------------- #
+# Prometheus Text Metrics
+# ---------------------------- #
+# Everything here is recorded from the event loop thread, so plain dicts are enough: no locks on the hot path.
+# Values are per worker process and are only formatted when /metrics is scraped.
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last)..., sum]
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Metric whose values are computed by `collect` at scrape time (a gauge unless `metric_type` says otherwise)."""
+
+    def __init__(
+        self, name: str, documentation: str, collect: Callable[[], Dict[Labels, float]], metric_type: str = "gauge"
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines += [f"{self.name}{_format_labels(labels)} {value}" for labels, value in self.collect().items()]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram("taskaza_http_request_duration_seconds", "HTTP request latency by route template, method and status")
+)
+http_requests_in_flight = {"value": 0}
+registry.register(
+    GaugeCallback(
+        "taskaza_http_requests_in_flight",
+        "HTTP requests currently being handled",
+        lambda: {(): http_requests_in_flight["value"]},
+    )
+)
+db_query_duration = registry.register(
+    Histogram("taskaza_db_query_duration_seconds", "Database statement latency by statement type")
+)
+password_hash_duration = registry.register(
+    Histogram(
+        "taskaza_password_hash_duration_seconds",
+        "Time spent in hash_password/verify_password, including waiting for a pool worker",
+        buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    )
+)
+
+
+# ---------------------------- #
+# Database Instrumentation
+# ---------------------------- #
+def _statement_type(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    return head[0].upper() if head else "OTHER"
+
+
+def instrument_engine(async_engine: AsyncEngine, name: str = "primary") -> Callable[[], None]:
+    """Time every cursor execution on `async_engine` by statement type; returns a function that stops it."""
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        db_query_duration.observe(
+            time.perf_counter() - started, (("engine", name), ("statement", _statement_type(statement)))
+        )
+
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    listeners = (("before_cursor_execute", _before), ("after_cursor_execute", _after), ("handle_error", _error))
+    for identifier, listener in listeners:
+        event.listen(async_engine.sync_engine, identifier, listener)
+
+    def uninstrument() -> None:
+        for identifier, listener in listeners:
+            event.remove(async_engine.sync_engine, identifier, listener)
+
+    return uninstrument
+
+
+POOL_GAUGES = {
+    "size": "Configured pool size",
+    "checked_out": "Connections currently checked out",
+    "checked_in": "Idle connections in the pool",
+    "overflow": "Overflow connections in use (negative while the pool is not yet full)",
+    "waiters": "Callers currently waiting to check out a connection",
+}
+POOL_COUNTERS = {
+    "checkouts": "Connections checked out since start",
+    "wait_seconds_total": "Seconds spent waiting to check out a connection",
+}
+
+
+def _pool_field(pools: Dict[str, Callable[[], dict]], field: str) -> Dict[Labels, float]:
+    values = {}
+    for name, status in pools.items():
+        current = status()
+        if field in current:
+            values[(("engine", name),)] = current[field]
+    return values
+
+
+def register_pool_metrics(pools: Dict[str, Callable[[], dict]]) -> None:
+    """Expose the fields of each engine's pool status dict (see `app.db.session.pool_status`)."""
+    for field, documentation in POOL_GAUGES.items():
+        registry.register(
+            GaugeCallback(f"taskaza_db_pool_{field}", documentation, lambda field=field: _pool_field(pools, field))
+        )
+    for field, documentation in POOL_COUNTERS.items():
+        metric_name = f"taskaza_db_pool_{field}" if field.endswith("_total") else f"taskaza_db_pool_{field}_total"
+        registry.register(
+            GaugeCallback(
+                metric_name, documentation, lambda field=field: _pool_field(pools, field), metric_type="counter"
+            )
+        )
+
+
+def register_cache_metrics(caches: Dict[str, Callable[[], dict]]) -> None:
+    """Expose each cache's `LRUCache.stats()` as a size gauge and hit/miss/eviction counters."""
+
+    def collect(field: str) -> Dict[Labels, float]:
+        return {(("cache", name),): stats()[field] for name, stats in caches.items()}
+
+    registry.register(GaugeCallback("taskaza_cache_size", "Entries in the cache", lambda: collect("size")))
+    for field in ("hits", "misses", "evictions"):
+        registry.register(
+            GaugeCallback(
+                f"taskaza_cache_{field}_total",
+                f"Cache {field} since start",
+                lambda field=field: collect(field),
+                metric_type="counter",
+            )
+        )
@@ -0,0 +1,134 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse
+
+from app.core import admission, metrics
+from app.core.config import settings
+
+# ---------------------------- #
+# Request Metrics Middleware
+# ---------------------------- #
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency per route template, method and status code."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.http_requests_in_flight["value"] += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_requests_in_flight["value"] -= 1
+            # The router stores the matched route on the scope; use its template to keep label cardinality bounded
+            route = scope.get("route")
+            metrics.http_request_duration.observe(
+                time.perf_counter() - start,
+                (
+                    ("method", scope["method"]),
+                    ("route", getattr(route, "path", UNMATCHED_ROUTE)),
+                    ("status", str(status_code)),
+                ),
+            )
+
+
+# ---------------------------- #
+# Response Compression
+# ---------------------------- #
+class CompressionMiddleware(GZipMiddleware):
+    """Gzip for clients that accept it, above `minimum_size` bytes (event streams are never compressed).
+
+    A compressed body is a different byte sequence, so its strong ETag is weakened; `If-None-Match` uses weak
+    comparison, so conditional requests keep working either way.
+    """
+
+    async def __call__(self, scope, receive, send):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/") and headers.get("content-encoding") == "gzip":
+                    headers["etag"] = "W/" + etag
+            await send(message)
+
+        await super().__call__(scope, receive, send_wrapper)
+
+
+# ---------------------------- #
+# Admission Control
+# ---------------------------- #
+class AdmissionMiddleware:
+    """Pure ASGI middleware that sheds load (503) and rate-limits /token and /signup per client IP (429).
+
+    Requests count as in flight until they finish, except event streams, which stop counting once they start.
+
+    The per-API-key and per-user limits need the authenticated caller, so the auth dependencies apply those.
+    """
+
+    def __init__(self, app, engines=()):
+        self.app = app
+        self.in_flight = 0
+        self.pool_wait = admission.PoolWaitMonitor(engines)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in admission.SHED_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        counted = True
+
+        async def send_wrapper(message):
+            nonlocal counted
+            if counted and message["type"] == "http.response.start" and _is_event_stream(message):
+                # An open SSE stream mostly sits idle; counting it would let enough dashboards shed all other traffic
+                self.in_flight -= 1
+                counted = False
+            await send(message)
+
+        try:
+            if admission.overloaded(self.in_flight, self.pool_wait):
+                admission.rejected_total["shed"] += 1
+                response = JSONResponse(
+                    {"detail": "Server is overloaded, retry later"},
+                    status_code=503,
+                    headers={"Retry-After": str(settings.SHED_RETRY_AFTER_SECONDS)},
+                )
+                await response(scope, receive, send)
+                return
+            if scope["path"] in admission.AUTH_PATHS and scope["method"] == "POST":
+                client = scope.get("client")
+                headers = await admission.check_rate_limit("auth_ip", client[0] if client else "unknown")
+                if headers:
+                    await JSONResponse({"detail": "Too many requests"}, status_code=429, headers=headers)(
+                        scope, receive, send
+                    )
+                    return
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if counted:
+                self.in_flight -= 1
+
+
+def _is_event_stream(message) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.startswith(b"text/event-stream") for name, value in message["headers"]
+    )
@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+# ---------------------------- #
+# Keyset Cursor Encoding
+# ---------------------------- #
+# Sort orders whose cursors carry a timestamp (ascending names; "-" marks descending)
+TIMESTAMP_SORTS = ("created_at", "updated_at")
+
+invalid_cursor_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail="Invalid pagination cursor",
+)
+
+expired_cursor_exception = HTTPException(
+    status_code=status.HTTP_410_GONE,
+    detail="Sync cursor is older than the retained deletion history; start a full sync without `since`",
+)
+
+
+def encode_cursor(sort: str, value: Any, last_id: int) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_value(sort: str, value: Any) -> Optional[Any]:
+    """The sort key in a cursor, checked against what `sort` keys on: a timestamp, a rank or a sync position."""
+    if sort.lstrip("-") in TIMESTAMP_SORTS:
+        # Raises on anything but an ISO timestamp string
+        return datetime.fromisoformat(value)
+    if sort == "rank" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError("rank cursor without a numeric rank")
+    if sort == "changes" and not (isinstance(value, list) and len(value) == 2 and all(type(v) is int for v in value)):
+        raise ValueError("changes cursor without a (change_seq, synced) position")
+    return value
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Optional[Any], int]:
+    """Decode a cursor produced by `encode_cursor` for the same sort order; 400 when it doesn't carry a valid key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort:
+            raise ValueError("cursor was issued for a different sort order")
+        last_id = int(data["id"])
+        return _cursor_value(sort, data.get("v")), last_id
+    except Exception:
+        raise invalid_cursor_exception
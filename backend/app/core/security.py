@@ -1,5 +1,14 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from app.core import metrics
+from app.core.config import settings
+
 # ---------------------------- #
 # Password Hashing
 # ---------------------------- #
@@ -12,3 +21,45 @@ def hash_password(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+# ---------------------------- #
+# Off-Loop Hashing Pool
+# ---------------------------- #
+# bcrypt releases the GIL, so a small thread pool keeps the event loop free while hashes are computed.
+# The automatic size splits the cores between worker processes so N workers don't oversubscribe the CPU.
+hash_workers = settings.PASSWORD_HASH_WORKERS or max(1, min(4, (os.cpu_count() or 1) // settings.WORKERS))
+hash_executor = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix="bcrypt")
+_pending = 0
+
+hashing_overloaded_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many concurrent login attempts, try again shortly",
+    headers={"Retry-After": "1"},
+)
+
+
+async def _run_in_hash_pool(fn, *args):
+    global _pending
+    # Requests beyond the running workers plus the allowed queue depth are shed instead of piling up
+    if _pending >= hash_workers + settings.PASSWORD_HASH_QUEUE_DEPTH:
+        raise hashing_overloaded_exception
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, fn, *args)
+    finally:
+        _pending -= 1
+        metrics.password_hash_duration.observe(time.perf_counter() - start, (("operation", fn.__name__),))
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+def pending_hashes() -> int:
+    return _pending
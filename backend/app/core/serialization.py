@@ -0,0 +1,72 @@
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from fastapi import HTTPException, Response, status
+from pydantic_core import to_json
+
+from app.core.config import settings
+from app.models.task import Task
+from app.schemas.task import TaskOut
+
+# ---------------------------- #
+# Fast JSON Responses
+# ---------------------------- #
+TASK_OUT_FIELDS = tuple(TaskOut.model_fields)
+
+invalid_fields_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    detail=f"fields must be a comma-separated list of: {', '.join(TASK_OUT_FIELDS)}",
+)
+
+
+class JSONBytesResponse(Response):
+    """Response whose body is already-encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
+def parse_task_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """The TaskOut fields named in a `fields=` query parameter, in TaskOut order; None when it isn't given."""
+    if value is None:
+        return None
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    if not requested or not requested.issubset(TASK_OUT_FIELDS):
+        raise invalid_fields_exception
+    return tuple(field for field in TASK_OUT_FIELDS if field in requested)
+
+
+def task_row(task: Task, fields: Sequence[str] = TASK_OUT_FIELDS) -> Dict[str, Any]:
+    # Read loaded column values straight from the instance state; fall back to the descriptor for unloaded ones
+    state = task.__dict__
+    row = {}
+    for field in fields:
+        value = state[field] if field in state else getattr(task, field)
+        # pydantic-core's fallback path for arbitrary enums is slow; emit the plain value instead
+        row[field] = value.value if isinstance(value, Enum) else value
+    return row
+
+
+def dump_tasks_json(tasks: Union[Task, Iterable[Task]], fields: Sequence[str] = TASK_OUT_FIELDS) -> bytes:
+    """Encode ORM rows straight to JSON with pydantic-core, skipping TaskOut validation and the stdlib encoder."""
+    if isinstance(tasks, Task):
+        return to_json(task_row(tasks, fields))
+    return to_json([task_row(task, fields) for task in tasks])
+
+
+def task_json_response(
+    tasks: Union[Task, Iterable[Task]],
+    response: Optional[Response] = None,
+    status_code: int = 200,
+    fields: Optional[Sequence[str]] = None,
+) -> Union[Task, Iterable[Task], Response]:
+    """Return the pre-encoded response when `FAST_JSON_RESPONSES` is on, otherwise let `response_model` handle it.
+
+    Headers already set on the route's injected `response` are carried over to the returned response. A sparse
+    fieldset is always encoded here: `response_model` would demand the fields that were left out.
+    """
+    if not settings.FAST_JSON_RESPONSES and fields is None:
+        return tasks
+    headers = dict(response.headers) if response is not None else None
+    return JSONBytesResponse(
+        dump_tasks_json(tasks, fields or TASK_OUT_FIELDS), status_code=status_code, headers=headers
+    )
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+# ---------------------------- #
+# Cross-Worker Shared State
+# ---------------------------- #
+# Small key/value state that every worker process must agree on (read-your-writes routing, rate limits).
+# `memory` keeps it per process, which is only correct with a single worker. `sqlite` keeps it in a local file
+# shared by every worker on the box. Its statements run on a dedicated thread per process, so waiting for another
+# worker's write lock (up to the busy timeout) holds up only the requests that need the store, not the event loop.
+
+
+class SharedStore(ABC):
+    """Async key/value store with per-key TTLs. Subclass for another backend (e.g. Redis)."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """The value stored under `key`; None when missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Forget `key`; a no-op when it is missing."""
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        """Add `amount` to an integer counter, starting from 0 (with a fresh TTL) when missing or expired."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Token bucket: take `cost` tokens if available; returns (allowed, tokens left).
+
+        Buckets start full and refill at `rate` tokens per second up to `capacity`. A bucket left alone long enough
+        to refill completely is indistinguishable from a new one, so backends may drop it then.
+        """
+
+
+class MemoryStore(SharedStore):
+    def __init__(self, max_size: int = 100_000):
+        self._cache: LRUCache[str] = LRUCache(max_size=max_size, ttl=float("inf"))
+        # key -> [count]; the list is updated in place so a counter keeps the expiry it started with
+        self._counters: LRUCache[List[int]] = LRUCache(max_size=max_size, ttl=float("inf"))
+        # key -> [tokens, updated at]
+        self._buckets: LRUCache[List[float]] = LRUCache(max_size=max_size, ttl=float("inf"))
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._cache.pop(key)
+        self._counters.pop(key)
+
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = [0]
+            self._counters.set(key, counter, ttl)
+        counter[0] += amount
+        return counter[0]
+
+    async def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        bucket = self._buckets.get(key) or [capacity, now]
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        bucket[:] = [tokens, now]
+        # Expires once it would be full again
+        self._buckets.set(key, bucket, (capacity - tokens) / rate)
+        return allowed, tokens
+
+
+T = TypeVar("T")
+
+
+class SQLiteFile:
+    """One SQLite connection per process to a file shared by all workers, opened lazily (never across a fork).
+
+    `run` calls a function with the connection on the file's own single thread, which also keeps every use of the
+    connection serial.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+    async def run(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        if self._pid != os.getpid():
+            # First use in this process: threads and connections don't survive a fork
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-shared")
+            self._connection, self._pid = None, os.getpid()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, function)
+
+    def _call(self, function: Callable[[sqlite3.Connection], T]) -> T:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+            connection.executescript(self.schema)
+            self._connection = connection
+        return function(self._connection)
+
+
+class SQLiteStore(SharedStore):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);
+    CREATE TABLE IF NOT EXISTS buckets (
+        key TEXT PRIMARY KEY, tokens REAL NOT NULL, allowed INTEGER NOT NULL, updated_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """
+    # Expired rows are deleted every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str = settings.SHARED_STATE_PATH):
+        self.file = SQLiteFile(path, self.SCHEMA)
+        self._writes = 0
+
+    def _written(self, connection: sqlite3.Connection) -> None:
+        # Runs on the file's thread, like every other use of the connection
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            now = time.time()
+            connection.execute("DELETE FROM kv WHERE expires_at <= ?", (now,))
+            connection.execute("DELETE FROM buckets WHERE expires_at <= ?", (now,))
+
+    async def get(self, key: str) -> Optional[str]:
+        def get(connection: sqlite3.Connection) -> Optional[str]:
+            row = connection.execute(
+                "SELECT value FROM kv WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            return row[0] if row else None
+
+        return await self.file.run(get)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        def write(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)", (key, value, time.time() + ttl)
+            )
+            self._written(connection)
+
+        await self.file.run(write)
+
+    async def delete(self, key: str) -> None:
+        await self.file.run(lambda connection: connection.execute("DELETE FROM kv WHERE key = ?", (key,)))
+
+    async def incr(self, key: str, amount: int, ttl: float) -> int:
+        def incr(connection: sqlite3.Connection) -> int:
+            now = time.time()
+            # One atomic statement: restart expired counters, otherwise add to them
+            row = connection.execute(
+                """
+                INSERT INTO kv (key, value, expires_at) VALUES (?1, ?2, ?3)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = CASE WHEN kv.expires_at <= ?4 THEN excluded.value ELSE CAST(kv.value AS INTEGER) + ?2 END,
+                    expires_at = CASE WHEN kv.expires_at <= ?4 THEN excluded.expires_at ELSE kv.expires_at END
+                RETURNING value
+                """,
+                (key, amount, now + ttl, now),
+            ).fetchone()
+            self._written(connection)
+            return int(row[0])
+
+        return await self.file.run(incr)
+
+    async def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        def take(connection: sqlite3.Connection) -> Tuple[bool, float]:
+            # One atomic statement; every SET expression sees the row as it was before the update
+            refilled = "min(:capacity, buckets.tokens + (:now - buckets.updated_at) * :rate)"
+            row = connection.execute(
+                f"""
+                INSERT INTO buckets (key, tokens, allowed, updated_at, expires_at)
+                VALUES (:key, :capacity - :cost, 1, :now, :now + :cost / :rate)
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = CASE WHEN {refilled} >= :cost THEN {refilled} - :cost ELSE {refilled} END,
+                    allowed = {refilled} >= :cost,
+                    updated_at = :now,
+                    expires_at = :now + (:capacity - CASE WHEN {refilled} >= :cost THEN {refilled} - :cost
+                                                          ELSE {refilled} END) / :rate
+                RETURNING allowed, tokens
+                """,
+                {"key": key, "rate": rate, "capacity": capacity, "cost": cost, "now": time.time()},
+            ).fetchone()
+            self._written(connection)
+            return bool(row[0]), row[1]
+
+        return await self.file.run(take)
+
+
+STORES = {"memory": MemoryStore, "sqlite": SQLiteStore}
+store: SharedStore = STORES[settings.SHARED_STATE_BACKEND]()
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Row, and_, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+
+def _pk(user_id: int, key: str):
+    return and_(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+
+
+def _lease(fingerprint: str, now: datetime) -> dict:
+    return {
+        "fingerprint": fingerprint,
+        "status_code": None,
+        "media_type": None,
+        "body": None,
+        "created_at": now,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "expires_at": now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+    }
+
+
+async def claim_idempotency_key(db: AsyncSession, user_id: int, key: str, fingerprint: str, now: datetime) -> bool:
+    """Insert the key as in progress and commit; False if it already exists (in any state)."""
+    try:
+        await db.execute(insert(IdempotencyKey).values(user_id=user_id, key=key, **_lease(fingerprint, now)))
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+        return False
+
+
+async def get_idempotency_key(db: AsyncSession, user_id: int, key: str, now: datetime) -> Optional[Row]:
+    """The stored key with `expired` and `lock_expired` flags, compared in SQL against `now`."""
+    result = await db.execute(
+        select(
+            IdempotencyKey.fingerprint,
+            IdempotencyKey.status_code,
+            IdempotencyKey.media_type,
+            IdempotencyKey.body,
+            (IdempotencyKey.expires_at <= now).label("expired"),
+            (IdempotencyKey.locked_until <= now).label("lock_expired"),
+        ).where(_pk(user_id, key))
+    )
+    return result.first()
+
+
+async def take_over_idempotency_key(db: AsyncSession, user_id: int, key: str, fingerprint: str, now: datetime) -> bool:
+    """Restart an expired key, or one whose request died mid-flight, as in progress for this request."""
+    result = await db.execute(
+        update(IdempotencyKey)
+        .where(
+            _pk(user_id, key),
+            or_(
+                IdempotencyKey.expires_at <= now,
+                and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until <= now),
+            ),
+        )
+        .values(**_lease(fingerprint, now))
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def complete_idempotency_key(
+    db: AsyncSession, user_id: int, key: str, status_code: int, media_type: Optional[str], body: bytes
+) -> None:
+    """Store the response; not committed here, so it lands in the same transaction as the write it belongs to."""
+    await db.execute(
+        update(IdempotencyKey)
+        .where(_pk(user_id, key))
+        .values(status_code=status_code, media_type=media_type, body=body)
+    )
+
+
+async def release_idempotency_key(db: AsyncSession, user_id: int, key: str) -> None:
+    """Forget an in-progress key whose request failed, so a retry runs the write again."""
+    await db.execute(delete(IdempotencyKey).where(_pk(user_id, key), IdempotencyKey.status_code.is_(None)))
+    await db.commit()
+
+
+async def purge_idempotency_keys(db: AsyncSession, now: datetime) -> int:
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    await db.commit()
+    return result.rowcount
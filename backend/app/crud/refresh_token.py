@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.refresh_token import RefreshToken
+
+
+async def create_refresh_token(db: AsyncSession, jti: str, user_id: int, expires_at: datetime) -> None:
+    await db.execute(insert(RefreshToken).values(jti=jti, user_id=user_id, expires_at=expires_at))
+
+
+async def consume_refresh_token(db: AsyncSession, jti: str) -> Optional[int]:
+    """Atomically mark an unused, unexpired token as used and return its owner; None if it can't be used."""
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.jti == jti, RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now)
+        .values(revoked_at=now)
+        .returning(RefreshToken.user_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_refresh_token_owner(db: AsyncSession, jti: str) -> Optional[int]:
+    result = await db.execute(select(RefreshToken.user_id).where(RefreshToken.jti == jti))
+    return result.scalar_one_or_none()
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+
+
+async def delete_expired_refresh_tokens(db: AsyncSession, user_id: int) -> None:
+    await db.execute(
+        delete(RefreshToken).where(
+            RefreshToken.user_id == user_id, RefreshToken.expires_at <= datetime.now(timezone.utc)
+        )
+    )
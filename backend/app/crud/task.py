@@ -1,42 +1,428 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+
+from app.core.events import TASK_CREATED, TASK_DELETED, TASK_UPDATED, publish_task_event
+from app.core.serialization import dump_tasks_json
+from app.crud.task_stats import apply_status_deltas, record_task_changes, status_deltas, status_value
+from app.db.search import FTS_TABLE, FTS_WEIGHTS, SEARCH_CONFIG, SEARCH_VECTOR_COLUMN, fts5_query
 from app.models.task import Task
+from app.models.task_stats import TaskStats
+from app.models.task_tombstone import TaskTombstone
+from app.schemas.task import TaskBatchOperation, TaskBatchResult, TaskOut, TaskSort, TaskStatus
+from sqlalchemy import and_, bindparam, column, delete, func, insert, literal_column, or_, table, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import load_only
 
+SORT_COLUMNS = {
+    TaskSort.id: (None, False),
+    TaskSort.id_desc: (None, True),
+    TaskSort.created_at: (Task.created_at, False),
+    TaskSort.created_at_desc: (Task.created_at, True),
+    TaskSort.updated_at: (Task.updated_at, False),
+    TaskSort.updated_at_desc: (Task.updated_at, True),
+}
+# Session.info key for a coroutine function that the next task write awaits with its result right before it commits,
+# so the caller can write in the same transaction (the Idempotency-Key response, see app.core.idempotency)
+BEFORE_COMMIT = "before_commit"
 
-async def create_task(db: AsyncSession, user_id: int, task_data: dict) -> Task:
-    task = Task(**task_data, user_id=user_id)
-    db.add(task)
+
+def _as_naive_utc(value: datetime) -> datetime:
+    # Timestamps are stored as naive UTC, so compare against naive UTC values
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def _commit(db: AsyncSession, result: Any) -> None:
+    before_commit = db.info.pop(BEFORE_COMMIT, None)
+    if before_commit is not None:
+        await before_commit(result)
     await db.commit()
-    await db.refresh(task)
+
+
+async def create_task(db: AsyncSession, user_id: int, task_data: dict) -> Task:
+    status = status_value(task_data.get("status", TaskStatus.pending))
+    change_seq = await record_task_changes(db, user_id, 1, {status: 1})
+    # INSERT ... RETURNING gives back the generated id and defaults without a follow-up SELECT
+    task = await db.scalar(insert(Task).values(**task_data, user_id=user_id, change_seq=change_seq).returning(Task))
+    await _commit(db, task)
+    await publish_task_event(user_id, TASK_CREATED, dump_tasks_json(task).decode())
     return task
 
 
-async def get_tasks_for_user(db: AsyncSession, user_id: int):
-    result = await db.execute(select(Task).where(Task.user_id == user_id))
+def sort_key(task: Task, sort: TaskSort) -> Any:
+    column, _ = SORT_COLUMNS[sort]
+    return getattr(task, column.key) if column is not None else None
+
+
+async def get_tasks_for_user(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[Any, int]] = None,
+    sort: TaskSort = TaskSort.id,
+    status: Optional[TaskStatus] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    """A page of the user's tasks. With `fields`, only those columns (plus the id and sort key) are loaded."""
+    query = select(Task).where(Task.user_id == user_id)
+    column, descending = SORT_COLUMNS[sort]
+    if fields is not None:
+        loaded = {"id", *fields} | ({column.key} if column is not None else set())
+        # raiseload: touching a column that wasn't selected is a bug, not a reason for a lazy load per row
+        query = query.options(load_only(*(getattr(Task, name) for name in sorted(loaded)), raiseload=True))
+
+    if status is not None:
+        query = query.where(Task.status == status)
+    if created_after is not None:
+        query = query.where(Task.created_at >= _as_naive_utc(created_after))
+    if created_before is not None:
+        query = query.where(Task.created_at < _as_naive_utc(created_before))
+    if updated_after is not None:
+        query = query.where(Task.updated_at >= _as_naive_utc(updated_after))
+    if updated_before is not None:
+        query = query.where(Task.updated_at < _as_naive_utc(updated_before))
+
+    if after is not None:
+        # Keyset predicate: resume strictly after the (sort key, id) of the previous page's last row
+        value, last_id = after
+        if column is None:
+            query = query.where(Task.id < last_id if descending else Task.id > last_id)
+        else:
+            key, bound = tuple_(column, Task.id), tuple_(_as_naive_utc(value), last_id)
+            query = query.where(key < bound if descending else key > bound)
+
+    order = [] if column is None else [column.desc() if descending else column.asc()]
+    order.append(Task.id.desc() if descending else Task.id.asc())
+    query = query.order_by(*order)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    result = await db.execute(query)
     return result.scalars().all()
 
 
+async def search_tasks(
+    db: AsyncSession,
+    user_id: int,
+    terms: List[str],
+    *,
+    limit: int,
+    after: Optional[Tuple[float, int]] = None,
+    status: Optional[TaskStatus] = None,
+) -> List[Tuple[Task, float]]:
+    """Tasks matching every term, best match first, as (task, rank) pairs; lower rank is better.
+
+    Matching goes through the full-text index, so the cost depends on the number of matches rather than the
+    number of tasks. `after` is the (rank, id) of the previous page's last row.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"), column(FTS_TABLE))
+        matches = (
+            select(fts.c.rowid.label("id"), func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS).label("rank"))
+            .where(fts.c[FTS_TABLE].match(fts5_query(terms, user_id)))
+            .subquery()
+        )
+        query = select(Task, matches.c.rank).join(matches, matches.c.id == Task.id)
+        rank = matches.c.rank
+    else:
+        # ts_rank is "higher is better"; negate it so both dialects page in ascending rank order
+        ts_query = func.plainto_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), " ".join(terms))
+        vector = literal_column(f"{Task.__tablename__}.{SEARCH_VECTOR_COLUMN}")
+        rank = (-func.ts_rank(vector, ts_query)).label("rank")
+        query = select(Task, rank).where(vector.op("@@")(ts_query))
+
+    query = query.where(Task.user_id == user_id)
+    if status is not None:
+        query = query.where(Task.status == status)
+    if after is not None:
+        last_rank, last_id = after
+        query = query.where(or_(rank > last_rank, and_(rank == last_rank, Task.id > last_id)))
+    query = query.order_by(rank, Task.id).limit(limit)
+
+    result = await db.execute(query)
+    return [(task, rank_value) for task, rank_value in result.all()]
+
+
+async def get_task_list_version(db: AsyncSession, user_id: int) -> Tuple[int, Optional[datetime]]:
+    """Row count and newest `updated_at` of a user's tasks; changes whenever any of their tasks change."""
+    result = await db.execute(select(func.count(Task.id), func.max(Task.updated_at)).where(Task.user_id == user_id))
+    count, last_updated = result.one()
+    return count, last_updated
+
+
+async def get_change_marks(db: AsyncSession, user_id: int) -> Tuple[Optional[int], int]:
+    """The user's latest committed change sequence number (None if untracked) and their tombstone compaction mark."""
+    row = (
+        await db.execute(select(TaskStats.change_seq, TaskStats.compacted_seq).where(TaskStats.user_id == user_id))
+    ).first()
+    return (row.change_seq, row.compacted_seq) if row else (None, 0)
+
+
+async def get_task_changes(
+    db: AsyncSession,
+    user_id: int,
+    *,
+    limit: int,
+    after: Optional[Tuple[int, int]] = None,
+    synced: int = 0,
+    upto: Optional[int] = None,
+) -> List[Tuple[int, int, Optional[Task]]]:
+    """Tasks written after the (change_seq, id) position `after`, merged with tombstones, oldest change first.
+
+    Returns up to `limit` (change_seq, id, task) entries, with task None for a deletion. Tombstones at or below
+    `synced` (the sequence number the client is already consistent with) are skipped. Only changes up to `upto` are
+    included, so a write committing between the two queries can't be skipped over.
+    """
+    tasks = select(Task).where(Task.user_id == user_id)
+    if after is not None:
+        tasks = tasks.where(tuple_(Task.change_seq, Task.id) > tuple_(*after))
+    if upto is not None:
+        tasks = tasks.where(Task.change_seq <= upto)
+    tasks = tasks.order_by(Task.change_seq, Task.id).limit(limit)
+    changes = [(task.change_seq, task.id, task) for task in (await db.execute(tasks)).scalars()]
+
+    if upto is None or synced < upto:
+        tombstones = select(TaskTombstone.change_seq, TaskTombstone.task_id).where(
+            TaskTombstone.user_id == user_id, TaskTombstone.change_seq > synced
+        )
+        if after is not None:
+            tombstones = tombstones.where(tuple_(TaskTombstone.change_seq, TaskTombstone.task_id) > tuple_(*after))
+        if upto is not None:
+            tombstones = tombstones.where(TaskTombstone.change_seq <= upto)
+        tombstones = tombstones.order_by(TaskTombstone.change_seq, TaskTombstone.task_id).limit(limit)
+        changes += [(seq, task_id, None) for seq, task_id in await db.execute(tombstones)]
+        changes.sort(key=lambda change: change[:2])
+    return changes[:limit]
+
+
+async def compact_task_tombstones(db: AsyncSession, older_than: datetime) -> int:
+    """Delete tombstones from before `older_than` and raise each affected user's compaction mark; returns the count."""
+    removed = (
+        await db.execute(
+            delete(TaskTombstone)
+            .where(TaskTombstone.deleted_at < older_than)
+            .returning(TaskTombstone.user_id, TaskTombstone.change_seq)
+        )
+    ).all()
+    marks = {}
+    for user_id, change_seq in removed:
+        marks[user_id] = max(marks.get(user_id, 0), change_seq)
+    if marks:
+        # Only ever move the mark forward
+        await db.execute(
+            update(TaskStats.__table__)
+            .where(TaskStats.user_id == bindparam("owner"), TaskStats.compacted_seq < bindparam("mark"))
+            .values(compacted_seq=bindparam("mark")),
+            [{"owner": user_id, "mark": mark} for user_id, mark in marks.items()],
+        )
+    await db.commit()
+    return len(removed)
+
+
+async def stream_tasks_for_user(
+    db: AsyncSession, user_id: int, *, status: Optional[TaskStatus] = None, batch_size: int = 500
+) -> AsyncIterator[Sequence[Task]]:
+    query = select(Task).where(Task.user_id == user_id).order_by(Task.id).execution_options(yield_per=batch_size)
+    if status is not None:
+        query = query.where(Task.status == status)
+
+    # Server-side cursor: rows are fetched batch_size at a time instead of materialising the whole result
+    result = await db.stream(query)
+    async for partition in result.scalars().partitions():
+        yield partition
+
+
 async def get_task_by_id(db: AsyncSession, task_id: int, user_id: int):
     result = await db.execute(select(Task).where(Task.id == task_id, Task.user_id == user_id))
     return result.scalar_one_or_none()
 
 
-async def update_task(db: AsyncSession, task: Task, updated_data: dict):
-    for key, value in updated_data.items():
-        setattr(task, key, value)
+async def update_task(db: AsyncSession, task_id: int, user_id: int, updated_data: dict) -> Optional[Task]:
+    """Apply `updated_data` with a single UPDATE ... RETURNING; None when the task doesn't exist for this user."""
+    # Lock first: on SQLite this write opens the write transaction, on Postgres it locks the user's counters row, so
+    # the previous status read below can't be changed by a concurrent write before ours commits
+    change_seq = await record_task_changes(db, user_id, 1)
+    old_status = None
+    if "status" in updated_data:
+        old_status = await db.scalar(select(Task.status).where(Task.id == task_id, Task.user_id == user_id))
+        if old_status is None:
+            await db.rollback()
+            return None
+        await apply_status_deltas(
+            db,
+            user_id,
+            status_deltas({task_id: status_value(old_status)}, {task_id: status_value(updated_data["status"])}),
+        )
 
-    await db.commit()
-    await db.refresh(task)
+    task = await db.scalar(
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == user_id)
+        .values(**updated_data, change_seq=change_seq)
+        .returning(Task)
+        # Overwrite any instance already in the identity map with the returned row
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    # End the transaction either way so the connection goes back to the pool right away
+    if task is not None:
+        await _commit(db, task)
+        await publish_task_event(user_id, TASK_UPDATED, dump_tasks_json(task).decode())
+    else:
+        await db.rollback()
     return task
 
 
-async def update_task_status(db: AsyncSession, task: Task, new_status: str):
-    task.status = new_status
-    await db.commit()
-    await db.refresh(task)
-    return task
+async def update_task_status(db: AsyncSession, task_id: int, user_id: int, new_status: str) -> Optional[Task]:
+    return await update_task(db, task_id, user_id, {"status": new_status})
+
+
+async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> bool:
+    """Delete with DELETE ... RETURNING and leave a tombstone; False when the task doesn't exist for this user."""
+    change_seq = await record_task_changes(db, user_id, 1)
+    deleted_status = await db.scalar(
+        delete(Task)
+        .where(Task.id == task_id, Task.user_id == user_id)
+        .returning(Task.status)
+        .execution_options(synchronize_session=False)
+    )
+    if deleted_status is None:
+        await db.rollback()
+        return False
+    await apply_status_deltas(db, user_id, {status_value(deleted_status): -1})
+    await db.execute(insert(TaskTombstone).values(user_id=user_id, task_id=task_id, change_seq=change_seq))
+    await _commit(db, True)
+    await publish_task_event(user_id, TASK_DELETED, f'{{"id":{task_id}}}')
+    return True
 
 
-async def delete_task(db: AsyncSession, task: Task):
-    await db.delete(task)
+async def import_tasks(db: AsyncSession, user_id: int, rows: List[dict]) -> int:
+    """Insert one chunk of validated task rows with a single executemany and commit; returns how many were created.
+
+    No per-task events are published: the caller publishes a single reset once the whole import is done.
+    """
+    now = datetime.now(timezone.utc)
+    deltas = Counter(status_value(row["status"]) for row in rows)
+    next_seq = (await record_task_changes(db, user_id, len(rows), deltas)) - len(rows) + 1
+    await db.execute(
+        insert(Task),
+        [
+            {**row, "user_id": user_id, "created_at": now, "updated_at": now, "change_seq": next_seq + offset}
+            for offset, row in enumerate(rows)
+        ],
+    )
     await db.commit()
+    return len(rows)
+
+
+async def apply_task_batch(
+    db: AsyncSession, user_id: int, operations: List[TaskBatchOperation]
+) -> List[TaskBatchResult]:
+    """Apply a list of create/update/status/delete operations with one statement per kind and a single commit.
+
+    Operations are replayed in order against an in-memory snapshot of the referenced rows, so later operations
+    see the effect of earlier ones (e.g. an update after a delete of the same task reports 404).
+    """
+    now = datetime.now(timezone.utc)
+    results: List[Optional[TaskBatchResult]] = [None] * len(operations)
+
+    # 1. One SELECT for every existing task the batch touches, after taking the user's write lock (see update_task)
+    # so the snapshot can't go stale before the batch commits
+    await record_task_changes(db, user_id, 0)
+    referenced = {op.id for op in operations if op.op != "create"}
+    current = {}
+    if referenced:
+        rows = await db.execute(
+            select(Task.id, Task.title, Task.description, Task.status, Task.created_at).where(
+                Task.user_id == user_id, Task.id.in_(referenced)
+            )
+        )
+        current = {row.id: dict(row._mapping) for row in rows}
+    original_status = {task_id: status_value(row["status"]) for task_id, row in current.items()}
+
+    # 2. Replay operations against the snapshot
+    # `changed` maps each updated task to the columns the batch set on it
+    creates, changed, deleted = [], {}, set()
+    for index, op in enumerate(operations):
+        if op.op == "create":
+            creates.append((index, {**op.task.model_dump(), "user_id": user_id, "created_at": now, "updated_at": now}))
+            continue
+
+        row = current.get(op.id)
+        if row is None:
+            results[index] = TaskBatchResult(index=index, op=op.op, status_code=404, detail="Task not found")
+            continue
+
+        if op.op == "delete":
+            del current[op.id]
+            changed.pop(op.id, None)
+            deleted.add(op.id)
+            results[index] = TaskBatchResult(index=index, op=op.op, status_code=204)
+            continue
+
+        values = op.task.model_dump() if op.op == "update" else {"status": op.status}
+        row.update(values)
+        changed.setdefault(op.id, set()).update(values)
+        results[index] = TaskBatchResult(index=index, op=op.op, status_code=200, task=TaskOut.model_validate(row))
+
+    # 3. Counters and one sequence number per written row, then one statement per kind of write and a single commit
+    written, changed, deleted = changed, sorted(changed), sorted(deleted)
+    final_status = {task_id: status_value(current[task_id]["status"]) for task_id in changed}
+    final_status.update(dict.fromkeys(deleted))
+    deltas = status_deltas(original_status, final_status)
+    deltas.update(status_value(values["status"]) for _, values in creates)
+    total = len(creates) + len(changed) + len(deleted)
+    next_seq = (await record_task_changes(db, user_id, total, deltas)) - total + 1 if total else 0
+
+    if creates:
+        for offset, (_, values) in enumerate(creates):
+            values["change_seq"] = next_seq + offset
+        next_seq += len(creates)
+        created = await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True), [values for _, values in creates]
+        )
+        for (index, _), task in zip(creates, created.all()):
+            results[index] = TaskBatchResult(
+                index=index, op="create", status_code=201, task=TaskOut.model_validate(task)
+            )
+    if changed:
+        # One executemany per set of written columns: a status change never rewrites (and re-indexes) the text
+        updates = {}
+        for offset, task_id in enumerate(changed):
+            columns = tuple(sorted(written[task_id]))
+            updates.setdefault(columns, []).append(
+                {
+                    "id": task_id,
+                    **{name: current[task_id][name] for name in columns},
+                    "updated_at": now,
+                    "change_seq": next_seq + offset,
+                }
+            )
+        for rows in updates.values():
+            await db.execute(update(Task), rows)
+        next_seq += len(changed)
+    if deleted:
+        await db.execute(delete(Task).where(Task.user_id == user_id, Task.id.in_(deleted)))
+        await db.execute(
+            insert(TaskTombstone),
+            [
+                {"user_id": user_id, "task_id": task_id, "change_seq": next_seq + offset, "deleted_at": now}
+                for offset, task_id in enumerate(deleted)
+            ],
+        )
+    await _commit(db, results)
+
+    for index, result in enumerate(results):
+        if result.status_code == 204:
+            await publish_task_event(user_id, TASK_DELETED, f'{{"id":{operations[index].id}}}')
+        elif result.task is not None:
+            event_type = TASK_CREATED if result.status_code == 201 else TASK_UPDATED
+            await publish_task_event(user_id, event_type, result.task.model_dump_json())
+    return results
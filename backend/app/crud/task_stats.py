@@ -0,0 +1,141 @@
+from collections import Counter
+from typing import Dict, List, Mapping, Optional
+
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.task import Task, TaskStatus
+from app.models.task_stats import TaskStats
+from app.models.task_tombstone import TaskTombstone
+from app.models.user import User
+
+STATUSES = [status.value for status in TaskStatus]
+
+
+def status_value(status) -> str:
+    # Accepts the model enum, the schema enum or a plain string
+    return getattr(status, "value", status)
+
+
+def empty_counts() -> Dict[str, int]:
+    return dict.fromkeys(STATUSES, 0)
+
+
+async def init_task_stats(db: AsyncSession, user_id: int) -> None:
+    """Create the zeroed counters row for a new user; part of the caller's transaction."""
+    await db.execute(insert(TaskStats).values(user_id=user_id, **empty_counts()))
+
+
+async def record_task_changes(
+    db: AsyncSession, user_id: int, changes: int, deltas: Optional[Mapping[str, int]] = None
+) -> int:
+    """Reserve `changes` sequence numbers for a task write and apply status `deltas`; returns the last one reserved.
+
+    Call it before touching the tasks table, in the same transaction. The counters row stays locked until commit,
+    so one user's writes commit in sequence order and a reader that sees number N also sees everything before it.
+    """
+    values = {status: getattr(TaskStats, status) + delta for status, delta in (deltas or {}).items() if delta}
+    last_seq = await db.scalar(
+        update(TaskStats)
+        .where(TaskStats.user_id == user_id)
+        .values(change_seq=TaskStats.change_seq + changes, **values)
+        .returning(TaskStats.change_seq)
+    )
+    if last_seq is None:
+        # User predates the counters table: start their row from the tasks as they are before this write
+        counts = (await count_tasks_by_status(db, user_id)).get(user_id, empty_counts())
+        for status, delta in (deltas or {}).items():
+            counts[status] += delta
+        await db.execute(insert(TaskStats).values(user_id=user_id, change_seq=changes, **counts))
+        last_seq = changes
+    return last_seq
+
+
+async def apply_status_deltas(db: AsyncSession, user_id: int, deltas: Mapping[str, int]) -> None:
+    """Add `deltas` (status -> change in count) to the user's counters, for changes only known after the write."""
+    values = {status: getattr(TaskStats, status) + delta for status, delta in deltas.items() if delta}
+    if values:
+        await db.execute(update(TaskStats).where(TaskStats.user_id == user_id).values(**values))
+
+
+async def count_tasks_by_status(db: AsyncSession, user_id: Optional[int] = None) -> Dict[int, Dict[str, int]]:
+    """Authoritative counts straight from the tasks table: user id -> status -> count."""
+    query = select(Task.user_id, Task.status, func.count(Task.id)).group_by(Task.user_id, Task.status)
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+    counts: Dict[int, Dict[str, int]] = {}
+    for owner, status, count in await db.execute(query):
+        counts.setdefault(owner, empty_counts())[status_value(status)] = count
+    return counts
+
+
+async def get_task_stats(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """Status counts for one user: a single primary-key lookup, whatever the number of tasks."""
+    row = (await db.execute(select(TaskStats).where(TaskStats.user_id == user_id))).scalar_one_or_none()
+    if row is None:
+        # No counters row yet (user predates them); fall back to counting, without writing on a read path
+        return (await count_tasks_by_status(db, user_id)).get(user_id, empty_counts())
+    return {status: getattr(row, status) for status in STATUSES}
+
+
+async def check_task_stats(db: AsyncSession) -> List[dict]:
+    """Users whose stored counters disagree with the tasks table (a missing row counts as a mismatch)."""
+    actual = await count_tasks_by_status(db)
+    stored = {
+        row.user_id: {status: getattr(row, status) for status in STATUSES}
+        for row in (await db.execute(select(TaskStats))).scalars()
+    }
+    mismatches = []
+    for user_id in (await db.execute(select(User.id).order_by(User.id))).scalars():
+        expected = actual.get(user_id, empty_counts())
+        if stored.get(user_id) != expected:
+            mismatches.append({"user_id": user_id, "stored": stored.get(user_id), "actual": expected})
+    return mismatches
+
+
+async def rebuild_task_stats(db: AsyncSession) -> int:
+    """Recompute every user's counters from the tasks table in one transaction; returns the number of users.
+
+    Change sequence numbers are carried over (or derived from the tasks and tombstones) so sync cursors stay valid.
+    """
+    actual = await count_tasks_by_status(db)
+    stored = {
+        row.user_id: row
+        for row in await db.execute(select(TaskStats.user_id, TaskStats.change_seq, TaskStats.compacted_seq))
+    }
+    seqs: Dict[int, int] = {}
+    for model in (Task, TaskTombstone):
+        rows = await db.execute(select(model.user_id, func.max(model.change_seq)).group_by(model.user_id))
+        for owner, seq in rows:
+            seqs[owner] = max(seqs.get(owner, 0), seq or 0)
+
+    user_ids = (await db.execute(select(User.id))).scalars().all()
+    rows = []
+    for user_id in user_ids:
+        previous = stored.get(user_id)
+        rows.append(
+            {
+                "user_id": user_id,
+                **actual.get(user_id, empty_counts()),
+                "change_seq": max(seqs.get(user_id, 0), previous.change_seq if previous else 0),
+                "compacted_seq": previous.compacted_seq if previous else 0,
+            }
+        )
+    await db.execute(delete(TaskStats))
+    if rows:
+        await db.execute(insert(TaskStats), rows)
+    await db.commit()
+    return len(user_ids)
+
+
+def status_deltas(before: Mapping[int, str], after: Mapping[int, Optional[str]]) -> Counter:
+    """Counter changes for tasks whose status went from `before[id]` to `after[id]` (None when deleted)."""
+    deltas: Counter = Counter()
+    for task_id, old in before.items():
+        new = after.get(task_id, old)
+        if new != old:
+            deltas[old] -= 1
+            if new is not None:
+                deltas[new] += 1
+    return deltas
@@ -3,7 +3,8 @@ from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.core.security import hash_password
+from app.core.security import hash_password_async
+from app.crud.task_stats import init_task_stats
 from app.models.user import User
 
 
@@ -13,9 +14,11 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
 
 
 async def create_user(db: AsyncSession, username: str, password: str):
-    hashed_pw = hash_password(password)
+    hashed_pw = await hash_password_async(password)
     new_user = User(username=username, hashed_password=hashed_pw)
     db.add(new_user)
+    await db.flush()
+    await init_task_stats(db, new_user.id)
     await db.commit()
     await db.refresh(new_user)
     return new_user
@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Column, Connection, DateTime, Dialect, Integer, String, delete, inspect, insert, select, text
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+from app.db import search
+from app.db.session import Base
+
+# ---------------------------- #
+# Schema Sync
+# ---------------------------- #
+# There are no migrations: create_all builds missing tables, and this fills in what it skips on existing ones,
+# i.e. columns and indexes added to a model after its table was created. New columns must be nullable or have a
+# server default. Nothing is ever dropped or altered.
+
+
+class SchemaState(Base):
+    """Fingerprint of the schema last applied by `ensure_schema`; a single row."""
+
+    __tablename__ = "schema_state"
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+def sync_schema(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection)
+    # create_all only fires the search index hook for tables it creates
+    search.create_search_index(connection)
+
+
+def schema_fingerprint(dialect: Dialect) -> str:
+    """Hash of the DDL the models (and the search index) compile to; changes whenever the schema does."""
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for statement in [search.SQLITE_TABLE_DDL, *search.SQLITE_TRIGGERS_DDL, *search.POSTGRES_DDL]:
+        digest.update(statement.encode())
+    return digest.hexdigest()
+
+
+def stored_fingerprint(connection: Connection) -> Optional[str]:
+    if not inspect(connection).has_table(SchemaState.__tablename__):
+        return None
+    return connection.execute(select(SchemaState.fingerprint)).scalar()
+
+
+def ensure_schema(connection: Connection, mode: str = "auto") -> bool:
+    """Bring the database schema up to date according to `mode` (see `DB_SCHEMA_SYNC`); True if DDL ran."""
+    if mode == "never":
+        return False
+    fingerprint = schema_fingerprint(connection.dialect)
+    if mode == "auto" and stored_fingerprint(connection) == fingerprint:
+        return False
+    sync_schema(connection)
+    connection.execute(delete(SchemaState))
+    connection.execute(insert(SchemaState).values(id=1, fingerprint=fingerprint))
+    return True
@@ -0,0 +1,99 @@
+import re
+from typing import List
+
+from sqlalchemy import Connection, text
+
+# ---------------------------- #
+# Full-Text Search Index
+# ---------------------------- #
+# SQLite: an external-content FTS5 table over tasks(title, description, user_id), kept in sync by triggers. Queries
+# AND the owner's id into the MATCH, so FTS5 only ranks that user's rows instead of every tenant's matches.
+# Postgres: a generated, weighted tsvector column on tasks with a GIN index.
+# Neither is mapped on the Task model, so ordinary task queries never load them.
+FTS_TABLE = "tasks_fts"
+SEARCH_VECTOR_COLUMN = "search_vector"
+SEARCH_CONFIG = "english"
+# bm25() weights for (title, description, user_id): a hit in the title counts more, the owner doesn't count
+FTS_WEIGHTS = (10.0, 1.0, 0.0)
+
+SQLITE_TABLE_DDL = f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, user_id, content='tasks', content_rowid='id', tokenize='porter unicode61'
+    )
+"""
+SQLITE_TRIGGERS_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+    END
+    """,
+    # Status-only updates don't touch the index
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, user_id ON tasks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, user_id)
+        VALUES ('delete', old.id, old.title, old.description, old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, user_id)
+        VALUES (new.id, new.title, new.description, new.user_id);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE tasks ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_tasks_{SEARCH_VECTOR_COLUMN} ON tasks USING gin ({SEARCH_VECTOR_COLUMN})",
+]
+
+
+def create_search_index(connection: Connection) -> None:
+    """Create the dialect's search index for the tasks table if it is missing; safe to run on every startup."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        existing = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).scalar()
+        if existing is not None and "user_id" not in existing:
+            # Built before the owner column: drop it and its triggers, and index everything again below
+            connection.execute(text(f"DROP TABLE {FTS_TABLE}"))
+            for suffix in ("ai", "ad", "au"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+            existing = None
+        if existing is None:
+            connection.execute(text(SQLITE_TABLE_DDL))
+            # Index rows that existed before the FTS table did
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        # Triggers are dropped together with the tasks table, so they are (re)created independently of the FTS table
+        for statement in SQLITE_TRIGGERS_DDL:
+            connection.execute(text(statement))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+
+
+def drop_search_index(connection: Connection) -> None:
+    """Drop the SQLite FTS table along with the tasks table (the Postgres column goes with the table itself)."""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def search_terms(query: str) -> List[str]:
+    """Split free text into word tokens; punctuation and FTS operators in user input are dropped."""
+    return re.findall(r"\w+", query)
+
+
+def fts5_query(terms: List[str], user_id: int) -> str:
+    # Every term quoted so it is matched literally; adjacent terms are implicitly ANDed. Terms only match the text
+    # columns, so searching for a number doesn't hit the owner column.
+    phrases = " ".join(f'"{term}"' for term in terms)
+    return f'user_id : "{user_id}" AND {{title description}} : ({phrases})'
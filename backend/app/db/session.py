@@ -1,25 +1,140 @@
+import os
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
-url = make_url(settings.DATABASE_URL)
-is_sqlite = url.drivername.startswith("sqlite")
 
-engine = create_async_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False} if is_sqlite else {}, pool_pre_ping=True
-)
-async_session = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+# ---------------------------- #
+# Observable Connection Pool
+# ---------------------------- #
+class ObservedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also tracks how many callers are waiting for a connection and how long they wait."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+
+    def _do_get(self):
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.waiters -= 1
+            self.checkouts += 1
+            self.wait_seconds_total += time.perf_counter() - start
+
+
+def pool_status(async_engine: AsyncEngine) -> dict:
+    pool = async_engine.sync_engine.pool
+    if not isinstance(pool, ObservedQueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "waiters": pool.waiters,
+        "checkouts": pool.checkouts,
+        "wait_seconds_total": round(pool.wait_seconds_total, 6),
+    }
+
+
+def engine_options(database_url: str = settings.DATABASE_URL) -> dict:
+    db_url = make_url(database_url)
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not (db_url.drivername.startswith("sqlite") and db_url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=ObservedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    if db_url.drivername.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    elif db_url.drivername == "postgresql+asyncpg":
+        # SQLAlchemy's prepared-statement cache and asyncpg's own statement cache
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return options
+
+
+# ---------------------------- #
+# SQLite Tuning
+# ---------------------------- #
+def sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+
+
+def configure_sqlite(async_engine: AsyncEngine, pragmas: dict) -> None:
+    """Run `PRAGMA name=value` for each entry on every new DBAPI connection of `async_engine`."""
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def ensure_sqlite_directory(async_engine: AsyncEngine, database: str) -> None:
+    """Create the database file's directory right before the first connection instead of at import time."""
+
+    @event.listens_for(async_engine.sync_engine, "do_connect")
+    def _make_directory(dialect, conn_rec, cargs, cparams):
+        os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+
+def create_engine_for(database_url: str) -> AsyncEngine:
+    async_engine = create_async_engine(database_url, **engine_options(database_url))
+    db_url = make_url(database_url)
+    if db_url.drivername.startswith("sqlite"):
+        if db_url.database not in (None, "", ":memory:"):
+            ensure_sqlite_directory(async_engine, db_url.database)
+        if settings.SQLITE_TUNING:
+            configure_sqlite(async_engine, sqlite_pragmas())
+    return async_engine
+
+
+def make_sessionmaker(async_engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+    )
+
+
+engine = create_engine_for(settings.DATABASE_URL)
+async_session = make_sessionmaker(engine)
+
+# Optional read replica; None when TSKZ_READ_DATABASE_URL is unset and every query goes to the primary
+read_engine = create_engine_for(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else None
+async_read_session = make_sessionmaker(read_engine) if read_engine is not None else None
 
 Base = declarative_base(name="BaseModel")
@@ -1,19 +1,32 @@
+import json
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
-from app.api.v1 import login, tasks, users
-from app.core import metadata
+from app.api.v1 import health, login, tasks, users
+from app.core import admission, events, idempotency, metadata, metrics
+from app.core.auth import identity_cache
 from app.core.config import settings
-from app.db.session import Base, engine
+from app.core.middleware import AdmissionMiddleware, CompressionMiddleware, MetricsMiddleware
+from app.db.schema import ensure_schema
+from app.db.session import engine, pool_status, read_engine
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    problems = settings.multi_worker_problems()
+    if problems:
+        raise RuntimeError(f"Can't run {settings.WORKERS} workers: " + "; ".join(problems))
+    if settings.DB_SCHEMA_SYNC != "never":
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_schema, settings.DB_SCHEMA_SYNC)
+    if settings.OPENAPI_CACHE_PATH and os.path.exists(settings.OPENAPI_CACHE_PATH):
+        # Precomputed by app.scripts.openapi; FastAPI serves app.openapi_schema instead of building it on first hit
+        with open(settings.OPENAPI_CACHE_PATH, "rb") as fh:
+            app.openapi_schema = json.loads(fh.read())
     yield
 
 
@@ -29,6 +42,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Added before CORS so shed and rate-limited responses still carry CORS headers
+app.add_middleware(AdmissionMiddleware, engines=[e for e in (engine, read_engine) if e is not None])
+
 # Handle CORS protection
 origins = settings.BACKEND_CORS_ORIGINS
 
@@ -38,11 +54,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "ETag",
+        "Idempotent-Replayed",
+        "Retry-After",
+        "RateLimit-Limit",
+        "RateLimit-Remaining",
+        "RateLimit-Reset",
+        "RateLimit-Policy",
+    ],
 )
 
+if settings.GZIP_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE, compresslevel=settings.GZIP_COMPRESS_LEVEL
+    )
+
+if settings.METRICS_ENABLED:
+    # Added last so it wraps CORS and sees every request's final status code
+    app.add_middleware(MetricsMiddleware)
+    metrics.instrument_engine(engine, "primary")
+    pools = {"primary": lambda: pool_status(engine)}
+    if read_engine is not None:
+        metrics.instrument_engine(read_engine, "replica")
+        pools["replica"] = lambda: pool_status(read_engine)
+    metrics.register_pool_metrics(pools)
+    metrics.register_cache_metrics({"identity": identity_cache.stats, "idempotency": idempotency.response_cache.stats})
+    metrics.registry.register(
+        metrics.GaugeCallback(
+            "taskaza_requests_rejected_total",
+            "Requests refused by admission control, by reason (api_key/user/auth_ip rate limit, or shed)",
+            lambda: {(("reason", reason),): count for reason, count in admission.rejected_total.items()},
+            metric_type="counter",
+        )
+    )
+    metrics.registry.register(
+        metrics.GaugeCallback(
+            "taskaza_event_subscribers",
+            "Open /tasks/events streams",
+            lambda: {(): events.broker.stats().get("subscribers", 0)},
+        )
+    )
+
 app.include_router(users.router)
 app.include_router(login.router)
 app.include_router(tasks.router)
+app.include_router(health.router)
 
 
 @app.get("/", include_in_schema=False)
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, String
+
+from app.db.session import Base
+
+
+class IdempotencyKey(Base):
+    """A client's `Idempotency-Key` for a task write and the response it got (see `app.core.idempotency`)."""
+
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # Hash of method, path and body: the same key can't be reused for a different request
+    fingerprint = Column(String(64), nullable=False)
+    # NULL while the first request is still running
+    status_code = Column(Integer)
+    media_type = Column(String)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    # A running request that hasn't finished by then is presumed dead and its key can be taken over
+    locked_until = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.db.session import Base
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    jti = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Set once the token has been exchanged; presenting it again signals reuse of a stolen token
+    revoked_at = Column(DateTime(timezone=True))
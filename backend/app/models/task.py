@@ -1,9 +1,10 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, event
 from sqlalchemy.orm import relationship
 
+from app.db.search import create_search_index, drop_search_index
 from app.db.session import Base
 
 
@@ -14,6 +15,16 @@ class TaskStatus(str, enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination: every list query is scoped to a user and ordered by (sort key, id)
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_tasks_user_id_status_created_at", "user_id", "status", "created_at"),
+        # Delta sync: changes after a (change_seq, id) cursor
+        Index("ix_tasks_user_id_change_seq_id", "user_id", "change_seq", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
@@ -24,4 +35,12 @@ class Task(Base):
         DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc)
     )
 
+    # Per-user sequence number of the write that last created or changed this task; 0 for tasks older than it
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
     user = relationship("User", back_populates="tasks")
+
+
+# Full-text search index (FTS5 table + triggers on SQLite, tsvector column + GIN index on Postgres)
+event.listen(Task.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Task.__table__, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Integer
+
+from app.db.session import Base
+
+
+class TaskStats(Base):
+    """Per-user task counts by status, kept in step with every task write (see `app.crud.task_stats`)."""
+
+    __tablename__ = "task_stats"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # One column per TaskStatus value
+    pending = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    # Last change sequence number handed out to this user's task writes (see `record_task_changes`)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Highest sequence number of a tombstone removed by compaction; older sync cursors can't be resumed
+    compacted_seq = Column(Integer, nullable=False, default=0, server_default="0")
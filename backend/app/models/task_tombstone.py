@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
+
+from app.db.session import Base
+
+
+class TaskTombstone(Base):
+    """Record of a deleted task, so `GET /tasks/changes` can report deletions; compacted after a retention period."""
+
+    __tablename__ = "task_tombstones"
+    __table_args__ = (Index("ix_task_tombstones_user_id_change_seq", "user_id", "change_seq", "task_id"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from enum import Enum
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TaskStatus(str, Enum):
@@ -9,6 +10,20 @@ class TaskStatus(str, Enum):
     completed = "completed"
 
 
+class TaskSort(str, Enum):
+    id = "id"
+    id_desc = "-id"
+    created_at = "created_at"
+    created_at_desc = "-created_at"
+    updated_at = "updated_at"
+    updated_at_desc = "-updated_at"
+
+
+class TaskExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class TaskBase(BaseModel):
     title: str
     description: str
@@ -63,3 +78,116 @@ class TaskOut(TaskBase):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+# ---------------------------- #
+# Batch Operations
+# ---------------------------- #
+MAX_BATCH_OPERATIONS = 500
+
+
+class TaskBatchCreate(BaseModel):
+    op: Literal["create"]
+    task: TaskCreate
+
+
+class TaskBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    task: TaskUpdate
+
+
+class TaskBatchStatus(BaseModel):
+    op: Literal["status"]
+    id: int
+    status: TaskStatus
+
+
+class TaskBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TaskBatchOperation = Annotated[
+    Union[TaskBatchCreate, TaskBatchUpdate, TaskBatchStatus, TaskBatchDelete], Field(discriminator="op")
+]
+
+
+class TaskBatchRequest(BaseModel):
+    operations: List[TaskBatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "operations": [
+                        {"op": "create", "task": {"title": "Grocery Run", "description": "Buy fruits"}},
+                        {"op": "status", "id": 1, "status": "completed"},
+                        {"op": "update", "id": 2, "task": {"title": "Renamed", "description": "New details"}},
+                        {"op": "delete", "id": 3},
+                    ]
+                }
+            ]
+        }
+    )
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: str
+    status_code: int
+    task: Optional[TaskOut] = None
+    detail: Optional[str] = None
+
+
+class TaskBatchResponse(BaseModel):
+    results: List[TaskBatchResult]
+
+
+# ---------------------------- #
+# Statistics
+# ---------------------------- #
+class TaskStatsOut(BaseModel):
+    pending: int
+    completed: int
+    total: int
+
+    model_config = ConfigDict(json_schema_extra={"examples": [{"pending": 3, "completed": 5, "total": 8}]})
+
+
+# ---------------------------- #
+# Delta Sync
+# ---------------------------- #
+class TaskChanges(BaseModel):
+    tasks: List[TaskOut] = Field(description="Tasks created or updated since the cursor, current state")
+    deleted: List[int] = Field(description="Ids of tasks deleted since the cursor")
+    cursor: str = Field(description="Pass as `since` on the next sync")
+    has_more: bool = Field(description="More changes are waiting; sync again right away with `cursor`")
+
+
+# ---------------------------- #
+# Bulk Import
+# ---------------------------- #
+class TaskImportError(BaseModel):
+    row: int = Field(description="1-based data row (CSV, header excluded) or line (NDJSON) of the upload")
+    errors: List[Dict[str, Any]] = Field(description="Validation errors for the row, as in a 422 response")
+
+
+class TaskImportResult(BaseModel):
+    created: int
+    rejected: int
+    errors: List[TaskImportError] = Field(description="Row-level errors, up to TSKZ_TASK_IMPORT_MAX_ERRORS of them")
+    errors_truncated: bool = Field(False, description="More rows were rejected than `errors` lists")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "created": 2,
+                    "rejected": 1,
+                    "errors": [{"row": 3, "errors": [{"type": "missing", "loc": ["title"], "msg": "Field required"}]}],
+                    "errors_truncated": False,
+                }
+            ]
+        }
+    )
@@ -0,0 +1,24 @@
+"""Write the OpenAPI document to a JSON file so the app can serve it without building it at runtime.
+
+Run it at image build time and point TSKZ_OPENAPI_CACHE_PATH at the output; regenerate whenever routes change.
+
+Usage (from backend/):
+
+    python -m app.scripts.openapi openapi.json
+"""
+
+import argparse
+import json
+
+from app.core.config import settings
+from app.main import app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", nargs="?", default=settings.OPENAPI_CACHE_PATH)
+    output = parser.parse_args().output
+    if not output:
+        parser.error("pass an output path or set TSKZ_OPENAPI_CACHE_PATH")
+    with open(output, "w") as fh:
+        json.dump(app.openapi(), fh, separators=(",", ":"))
+    print(f"Wrote OpenAPI schema to {output}")
@@ -0,0 +1,37 @@
+"""Check or rebuild the per-user task counters behind `GET /tasks/stats`.
+
+Usage (from backend/):
+
+    python -m app.scripts.task_stats check     # exit code 1 if any user's counters are off
+    python -m app.scripts.task_stats rebuild   # recount every user from the tasks table
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.crud.task_stats import check_task_stats, rebuild_task_stats
+from app.db.session import async_session, engine
+
+
+async def main(command: str) -> int:
+    try:
+        async with async_session() as db:
+            if command == "rebuild":
+                users = await rebuild_task_stats(db)
+                print(f"Rebuilt task stats for {users} users")
+                return 0
+
+            mismatches = await check_task_stats(db)
+            for mismatch in mismatches:
+                print(f"user {mismatch['user_id']}: stored {mismatch['stored']}, actual {mismatch['actual']}")
+            print(f"{len(mismatches)} users with inconsistent task stats")
+            return 1 if mismatches else 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("check", "rebuild"))
+    sys.exit(asyncio.run(main(parser.parse_args().command)))
@@ -0,0 +1,37 @@
+"""Compact the deleted-task tombstones behind `GET /tasks/changes`.
+
+Run it periodically (e.g. daily from cron). Clients whose sync cursor predates the compacted tombstones get
+410 Gone and fall back to a full sync.
+
+Usage (from backend/):
+
+    python -m app.scripts.task_tombstones compact
+    python -m app.scripts.task_tombstones compact --days 7
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.crud.task import compact_task_tombstones
+from app.db.session import async_session, engine
+
+
+async def main(days: int) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    try:
+        async with async_session() as db:
+            removed = await compact_task_tombstones(db, cutoff)
+        print(f"Removed {removed} tombstones older than {cutoff.isoformat()}")
+        return 0
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("compact",))
+    parser.add_argument("--days", type=int, default=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+    sys.exit(asyncio.run(main(parser.parse_args().days)))
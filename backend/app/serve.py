@@ -0,0 +1,64 @@
+"""Run the API with one or more uvicorn worker processes.
+
+Refuses to start several workers with settings they can't share (see Settings.multi_worker_problems), and syncs the
+database schema once here instead of letting every worker race to run DDL at boot.
+
+Usage (from backend/):
+
+    TSKZ_JWT_SECRET_KEY=... TSKZ_SHARED_STATE_BACKEND=sqlite TSKZ_EVENTS_BACKEND=sqlite \\
+        python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+import uvicorn
+
+from app.core.config import settings
+
+
+async def sync_schema_once() -> None:
+    # Importing the app registers every model's table on the metadata ensure_schema syncs
+    from app.db.schema import ensure_schema
+    from app.db.session import engine
+    from app.main import app  # noqa: F401
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_schema, settings.DB_SCHEMA_SYNC)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS, help="Default: TSKZ_WORKERS")
+    args = parser.parse_args()
+
+    problems = settings.model_copy(update={"WORKERS": args.workers}).multi_worker_problems()
+    if problems:
+        sys.exit(f"Refusing to start {args.workers} workers:\n" + "\n".join(f"  - {problem}" for problem in problems))
+
+    if settings.DB_SCHEMA_SYNC != "never":
+        asyncio.run(sync_schema_once())
+    # Worker processes read their settings from the environment
+    os.environ["TSKZ_WORKERS"] = str(args.workers)
+    os.environ["TSKZ_DB_SCHEMA_SYNC"] = "never"
+
+    # Behind a proxy, per-IP rate limits need the client address from X-Forwarded-For, not the proxy's
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""HTTP load benchmark for the Taskaza API: throughput and p50/p95/p99 latency per endpoint.
+
+Runs against the ASGI app in-process (httpx.ASGITransport), a local uvicorn it spawns, or any running server.
+A fresh SQLite file is used unless --database-url (e.g. Postgres) or --base-url is given.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_http --target inprocess --save benchmarks/results/baseline.json
+    python -m benchmarks.bench_http --target uvicorn --compare benchmarks/results/baseline.json
+    python -m benchmarks.bench_http --base-url http://localhost:8000 --scenario crud
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+SCENARIOS = ("auth", "crud", "list")
+API_KEY = os.environ.setdefault("TSKZ_HTTP_API_KEY", "bench-api-key")
+# Measure the app, not the limiter: every simulated user logs in from the same address
+os.environ.setdefault("TSKZ_RATE_LIMIT_ENABLED", "false")
+
+
+# ---------------------------- #
+# Recording
+# ---------------------------- #
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed: Dict[str, float] = {}
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, expect: int, **kwargs):
+        start = time.perf_counter()
+        res = await client.request(method, url, **kwargs)
+        self.latencies[label].append(time.perf_counter() - start)
+        if res.status_code != expect:
+            self.errors[label] += 1
+        return res
+
+    def summary(self) -> Dict[str, dict]:
+        report = {}
+        for label, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            scenario = label.split(":", 1)[0]
+            report[label] = {
+                "requests": len(ordered),
+                "errors": self.errors[label],
+                "throughput_rps": round(len(ordered) / self.elapsed[scenario], 2),
+                "p50_ms": round(percentile(ordered, 50) * 1e3, 3),
+                "p95_ms": round(percentile(ordered, 95) * 1e3, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1e3, 3),
+            }
+        return report
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    # Nearest-rank percentile on an already sorted sample
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def run_workers(concurrency: int, total: int, job) -> None:
+    counter = iter(range(total))
+
+    async def worker():
+        for index in counter:
+            await job(index)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, label: str, username: str, password: str) -> dict:
+    await recorder.request(
+        client, f"{label}:POST /signup", "POST", "/signup", 201, json={"username": username, "password": password}
+    )
+    res = await recorder.request(
+        client, f"{label}:POST /token", "POST", "/token", 200, data={"username": username, "password": password}
+    )
+    return {"Authorization": f"Bearer {res.json()['access_token']}", "X-API-Key": API_KEY}
+
+
+# ---------------------------- #
+# Scenarios
+# ---------------------------- #
+async def scenario_auth(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    """Signup/login storm: every virtual user signs up and logs in at once."""
+    run_id = uuid.uuid4().hex[:6]
+
+    async def job(index: int):
+        await login(client, recorder, "auth", f"storm-{run_id}-{index}", "storm-password")
+
+    await run_workers(args.concurrency, args.users, job)
+
+
+async def scenario_crud(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    """CRUD mix: create, read, list, patch, put and delete, as a sync client would."""
+    headers = await login(client, recorder, "crud-setup", f"crud-{uuid.uuid4().hex[:6]}", "crud-password")
+
+    async def job(index: int):
+        body = {"title": f"Task {index}", "description": "Benchmark task", "status": "pending"}
+        res = await recorder.request(client, "crud:POST /tasks/", "POST", "/tasks/", 201, json=body, headers=headers)
+        task_id = res.json()["id"]
+        await recorder.request(client, "crud:GET /tasks/{id}", "GET", f"/tasks/{task_id}", 200, headers=headers)
+        await recorder.request(client, "crud:GET /tasks/", "GET", "/tasks/", 200, params={"limit": 20}, headers=headers)
+        await recorder.request(
+            client,
+            "crud:PATCH /tasks/{id}",
+            "PATCH",
+            f"/tasks/{task_id}",
+            200,
+            json={"status": "completed"},
+            headers=headers,
+        )
+        await recorder.request(
+            client, "crud:PUT /tasks/{id}", "PUT", f"/tasks/{task_id}", 200, json=body, headers=headers
+        )
+        if index % 2:
+            await recorder.request(
+                client, "crud:DELETE /tasks/{id}", "DELETE", f"/tasks/{task_id}", 204, headers=headers
+            )
+
+    await run_workers(args.concurrency, args.requests, job)
+
+
+async def scenario_list(client: httpx.AsyncClient, recorder: Recorder, args) -> None:
+    """Large-list reads: one user with many tasks, read page by page and exported in full."""
+    headers = await login(client, recorder, "list-setup", f"list-{uuid.uuid4().hex[:6]}", "list-password")
+    for offset in range(0, args.list_size, 500):
+        operations = [
+            {"op": "create", "task": {"title": f"Task {offset + i}", "description": "Seeded for list reads"}}
+            for i in range(min(500, args.list_size - offset))
+        ]
+        await recorder.request(
+            client,
+            "list-setup:POST /tasks/batch",
+            "POST",
+            "/tasks/batch",
+            200,
+            json={"operations": operations},
+            headers=headers,
+        )
+
+    async def job(index: int):
+        if index % 10 == 0:
+            await recorder.request(client, "list:GET /tasks/export", "GET", "/tasks/export", 200, headers=headers)
+        elif index % 10 == 5:
+            # What a list view needs: a sparse fieldset reads and sends a fraction of the bytes
+            await recorder.request(
+                client,
+                "list:GET /tasks/?limit=1000&fields=id,title,status",
+                "GET",
+                "/tasks/",
+                200,
+                params={"limit": 1000, "fields": "id,title,status"},
+                headers=headers,
+            )
+        else:
+            await recorder.request(
+                client, "list:GET /tasks/?limit=1000", "GET", "/tasks/", 200, params={"limit": 1000}, headers=headers
+            )
+
+    await run_workers(args.concurrency, max(1, args.requests // 5), job)
+
+
+SCENARIO_FUNCS = {"auth": scenario_auth, "crud": scenario_crud, "list": scenario_list}
+
+
+# ---------------------------- #
+# Targets
+# ---------------------------- #
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def inprocess_client(database_url: str):
+    os.environ["TSKZ_DATABASE_URL"] = database_url
+    from app.db.session import Base, engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        yield client
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def uvicorn_client(database_url: str):
+    port = _free_port()
+    env = {**os.environ, "TSKZ_DATABASE_URL": database_url}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            for _ in range(100):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("uvicorn did not become healthy")
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+@asynccontextmanager
+async def remote_client(base_url: str):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        yield client
+
+
+# ---------------------------- #
+# Baselines
+# ---------------------------- #
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Endpoints whose p95 grew or throughput dropped by more than `threshold` (a fraction)."""
+    regressions = []
+    for label, now in current.items():
+        before = baseline.get(label)
+        if not before or label.split(":", 1)[0].endswith("-setup"):
+            continue
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{label}: p95 {before['p95_ms']:.2f} -> {now['p95_ms']:.2f} ms")
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{label}: throughput {before['throughput_rps']:.1f} -> {now['throughput_rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def print_report(report: Dict[str, dict]) -> None:
+    print(f"{'endpoint':<36}{'reqs':>7}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, row in report.items():
+        print(
+            f"{label:<36}{row['requests']:>7}{row['errors']:>5}{row['throughput_rps']:>10.1f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--base-url", help="Benchmark an already running server instead of --target")
+    parser.add_argument("--database-url", help="Database for inprocess/uvicorn targets (default: temp SQLite file)")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Iterations of the CRUD mix / list reads x5")
+    parser.add_argument("--users", type=int, default=32, help="Virtual users in the signup/login storm")
+    parser.add_argument("--list-size", type=int, default=5000, help="Tasks seeded for the large-list scenario")
+    parser.add_argument("--save", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression as a fraction (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    if args.base_url:
+        target = remote_client(args.base_url)
+    elif args.target == "uvicorn":
+        target = uvicorn_client(database_url)
+    else:
+        target = inprocess_client(database_url)
+
+    recorder = Recorder()
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    async with target as client:
+        for name in scenarios:
+            start = time.perf_counter()
+            await SCENARIO_FUNCS[name](client, recorder, args)
+            elapsed = time.perf_counter() - start
+            recorder.elapsed[name] = elapsed
+            recorder.elapsed[f"{name}-setup"] = elapsed
+
+    report = recorder.summary()
+    print_report(report)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        meta = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or args.target,
+            "python": platform.python_version(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+        }
+        with open(args.save, "w") as fh:
+            json.dump({"meta": meta, "results": report}, fh, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            print("\n".join(f"  - {line}" for line in regressions))
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,78 @@
+"""Per-row cost of encoding task lists: FastAPI `response_model` path vs. the fast path.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_serialization --rows 1000 --repeat 50
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from pydantic import TypeAdapter
+
+from app.core.serialization import dump_tasks_json
+from app.models.task import Task, TaskStatus
+from app.models.user import User  # noqa: F401  (registers the Task.user relationship target)
+from app.schemas.task import TaskOut
+
+task_list_adapter = TypeAdapter(list[TaskOut])
+
+
+def make_tasks(count: int) -> list[Task]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc).replace(tzinfo=None)
+    return [
+        Task(
+            id=i,
+            user_id=1,
+            title=f"Task {i}",
+            description="Buy fruits and vegetables, dairy products " * 2,
+            status=TaskStatus.completed if i % 3 == 0 else TaskStatus.pending,
+            created_at=start + timedelta(seconds=i),
+            updated_at=start + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def response_model_path(tasks: list[Task]) -> bytes:
+    # Mirrors fastapi.routing.serialize_response + JSONResponse.render
+    validated = task_list_adapter.validate_python(tasks, from_attributes=True)
+    content = task_list_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_path(tasks: list[Task]) -> bytes:
+    return dump_tasks_json(tasks)
+
+
+def measure(fn, tasks: list[Task], repeat: int) -> float:
+    fn(tasks)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tasks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.rows)
+    assert json.loads(response_model_path(tasks)) == json.loads(fast_path(tasks))
+
+    print(f"{'path':<16}{'total (ms)':>12}{'per row (us)':>14}")
+    baseline = None
+    for name, fn in (("response_model", response_model_path), ("fast", fast_path)):
+        elapsed = measure(fn, tasks, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<16}{elapsed * 1e3:>12.2f}{elapsed / args.rows * 1e6:>14.2f}   x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
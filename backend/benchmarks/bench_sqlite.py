@@ -0,0 +1,95 @@
+"""Read/write concurrency on a SQLite file: default pragmas vs. the TSKZ_SQLITE_* tuning profile.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_sqlite --writers 8 --readers 8 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.session import Base, configure_sqlite, sqlite_pragmas
+from app.models.task import Task
+from app.models.user import User
+
+
+async def writer(engine, deadline: float, counters: dict) -> None:
+    while time.perf_counter() < deadline:
+        now = datetime.now(timezone.utc)
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(
+                    insert(Task).values(user_id=1, title="bench", description="x" * 64, created_at=now, updated_at=now)
+                )
+            counters["writes"] += 1
+        except OperationalError:
+            counters["errors"] += 1
+
+
+async def reader(engine, deadline: float, counters: dict) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(
+                    select(Task.id, Task.title).where(Task.user_id == 1).order_by(Task.id.desc()).limit(50)
+                )
+            counters["reads"] += 1
+        except OperationalError:
+            counters["errors"] += 1
+
+
+async def run_profile(name: str, pragmas: dict, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="taskaza-bench-"), f"{name}.db")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=args.writers + args.readers,
+    )
+    if pragmas:
+        configure_sqlite(engine, pragmas)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(id=1, username="bench", hashed_password="x"))
+
+    counters = {"writes": 0, "reads": 0, "errors": 0}
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(
+        *(writer(engine, deadline, counters) for _ in range(args.writers)),
+        *(reader(engine, deadline, counters) for _ in range(args.readers)),
+    )
+
+    async with engine.connect() as conn:
+        rows = (await conn.execute(select(func.count(Task.id)))).scalar_one()
+    await engine.dispose()
+    assert rows == counters["writes"]
+    return counters
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<10}{'writes/s':>12}{'reads/s':>12}{'errors':>10}")
+    for name, pragmas in (("default", {}), ("tuned", sqlite_pragmas())):
+        counters = await run_profile(name, pragmas, args)
+        print(
+            f"{name:<10}{counters['writes'] / args.seconds:>12.0f}"
+            f"{counters['reads'] / args.seconds:>12.0f}{counters['errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
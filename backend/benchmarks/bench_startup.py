@@ -0,0 +1,103 @@
+"""Cold start: time from process spawn to the first answered request, per startup mode.
+
+Each run spawns a fresh uvicorn process against the same SQLite file and polls /health until it answers, then times
+the first /openapi.json request. Modes:
+
+    always        DB_SCHEMA_SYNC=always: run create_all / schema sync on every boot (the old behaviour)
+    auto          DB_SCHEMA_SYNC=auto: skip DDL when the stored schema fingerprint matches
+    auto+openapi  auto, plus the OpenAPI document precomputed by app.scripts.openapi
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+MODES = {
+    "always": {"TSKZ_DB_SCHEMA_SYNC": "always"},
+    "auto": {"TSKZ_DB_SCHEMA_SYNC": "auto"},
+    "auto+openapi": {"TSKZ_DB_SCHEMA_SYNC": "auto", "TSKZ_OPENAPI_CACHE_PATH": "{workdir}/openapi.json"},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], env=env, check=True)
+    return time.perf_counter() - start
+
+
+def boot(env: dict) -> tuple:
+    """(seconds until /health answered, seconds for the first /openapi.json) for one fresh process."""
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10) as client:
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+                if server.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+            first_request = time.perf_counter() - start
+            openapi_start = time.perf_counter()
+            client.get("/openapi.json").raise_for_status()
+            return first_request, time.perf_counter() - openapi_start
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", help="Database to boot against (default: a temp SQLite file)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="taskaza-startup-")
+    base_env = {
+        **os.environ,
+        "TSKZ_HTTP_API_KEY": os.environ.get("TSKZ_HTTP_API_KEY", "bench-api-key"),
+        "TSKZ_DATABASE_URL": args.database_url or f"sqlite+aiosqlite:///{workdir}/startup.db",
+    }
+    subprocess.run(
+        [sys.executable, "-m", "app.scripts.openapi", f"{workdir}/openapi.json"],
+        env=base_env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    # One boot so the schema (and its fingerprint) exist, as on any restart after the first deploy
+    boot({**base_env, "TSKZ_DB_SCHEMA_SYNC": "always"})
+
+    print(f"import app.main: {import_time(base_env) * 1e3:.0f} ms")
+    print(f"{'mode':<16}{'first request ms':>18}{'first /openapi.json ms':>24}")
+    for mode, overrides in MODES.items():
+        env = {**base_env, **{key: value.format(workdir=workdir) for key, value in overrides.items()}}
+        samples = [boot(env) for _ in range(args.runs)]
+        first_request = statistics.median(sample[0] for sample in samples)
+        openapi = statistics.median(sample[1] for sample in samples)
+        print(f"{mode:<16}{first_request * 1e3:>18.0f}{openapi * 1e3:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
 import os
 import sys
+import uuid
 
+import pytest
 import pytest_asyncio
 from dotenv import load_dotenv
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Tests sign up many users from one client address; test_admission.py enables the limits it exercises
+os.environ.setdefault("TSKZ_RATE_LIMIT_ENABLED", "false")
 
 from app.core.dependencies import get_db
-from app.db.session import Base
+from app.crud.task_stats import init_task_stats
+from app.db.session import Base, create_engine_for, make_sessionmaker
 from app.main import app
+from app.models.user import User
 
 load_dotenv()
 
@@ -30,6 +37,11 @@ async def override_get_db():
 app.dependency_overrides[get_db] = override_get_db
 
 
+@pytest.fixture
+def test_engine():
+    return engine_test
+
+
 @pytest_asyncio.fixture
 async def async_client():
     async with engine_test.begin() as conn:
@@ -45,3 +57,32 @@ async def auth_headers_only_token(async_client):
     res = await async_client.post("/token", data={"username": "badtester", "password": "badpass"})
     token = res.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest_asyncio.fixture
+async def make_auth_headers(async_client):
+    """Factory that signs up a fresh user and returns JWT + API key headers for it."""
+
+    async def _make(password: str = "pass"):
+        username = f"user-{uuid.uuid4().hex[:8]}"
+        await async_client.post("/signup", json={"username": username, "password": password})
+        res = await async_client.post("/token", data={"username": username, "password": password})
+        token = res.json()["access_token"]
+        return {"Authorization": f"Bearer {token}", "X-API-Key": os.getenv("TSKZ_HTTP_API_KEY", "sample_key")}
+
+    return _make
+
+
+@pytest_asyncio.fixture
+async def file_db(tmp_path):
+    """Sessions on a file-backed SQLite database with one user, where concurrent sessions really contend."""
+    engine = create_engine_for(f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session = make_sessionmaker(engine)
+    async with session() as db:
+        user_id = await db.scalar(insert(User).values(username="racer", hashed_password="x").returning(User.id))
+        await init_task_stats(db, user_id)
+        await db.commit()
+    yield session, user_id
+    await engine.dispose()
@@ -0,0 +1,160 @@
+import asyncio
+import sys
+
+import pytest
+
+from app import serve
+from app.api.v1 import tasks as tasks_api
+from app.core import admission, shared
+from app.core.config import settings
+from app.core.middleware import AdmissionMiddleware
+from app.core.shared import MemoryStore, SQLiteStore
+from app.db.session import create_engine_for
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Rate limits on, with empty buckets in a fresh store."""
+    monkeypatch.setattr(shared, "store", MemoryStore())
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    return monkeypatch
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_token_bucket(backend, tmp_path, monkeypatch):
+    store = MemoryStore() if backend == "memory" else SQLiteStore(str(tmp_path / "shared.db"))
+    assert await store.take("k", rate=0.001, capacity=2) == (True, pytest.approx(1, abs=0.01))
+    assert (await store.take("k", rate=0.001, capacity=2))[0] is True
+    allowed, tokens = await store.take("k", rate=0.001, capacity=2)
+    assert allowed is False and tokens < 1
+    # Buckets are independent, and refill over time
+    assert (await store.take("other", rate=0.001, capacity=2))[0] is True
+    assert (await store.take("fast", rate=1000, capacity=1))[0] is True
+    await asyncio.sleep(0.01)
+    assert (await store.take("fast", rate=1000, capacity=1))[0] is True
+
+
+@pytest.mark.asyncio
+async def test_per_user_limit_returns_429_with_rate_limit_headers(async_client, make_auth_headers, limits):
+    headers, other = await make_auth_headers(), await make_auth_headers()
+    limits.setattr(settings, "RATE_LIMIT_USER_BURST", 3)
+    limits.setattr(settings, "RATE_LIMIT_USER_PER_SECOND", 0.01)
+
+    statuses = [(await async_client.get("/tasks/stats", headers=headers)).status_code for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+    res = await async_client.get("/tasks/stats", headers=headers)
+    assert res.status_code == 429
+    assert res.headers["RateLimit-Limit"] == "3" and res.headers["RateLimit-Remaining"] == "0"
+    assert int(res.headers["Retry-After"]) >= 1 and int(res.headers["RateLimit-Reset"]) >= 1
+    # Another user has their own bucket
+    assert (await async_client.get("/tasks/stats", headers=other)).status_code == 200
+    assert admission.rejected_total["user"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_api_key_limit_is_opt_in(async_client, make_auth_headers, limits):
+    # Every client shares the one API key, so by default its bucket is off rather than a global cap
+    headers = await make_auth_headers()
+    limits.setattr(settings, "RATE_LIMIT_API_KEY_BURST", 1)
+    assert [(await async_client.get("/tasks/stats", headers=headers)).status_code for _ in range(2)] == [200, 200]
+    limits.setattr(settings, "RATE_LIMIT_API_KEY_PER_SECOND", 0.01)
+    assert [(await async_client.get("/tasks/stats", headers=headers)).status_code for _ in range(2)] == [200, 429]
+
+
+def test_serve_trusts_configured_proxies_for_the_client_ip(monkeypatch):
+    calls = []
+    monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(settings, "DB_SCHEMA_SYNC", "never")
+    monkeypatch.setattr(settings, "FORWARDED_ALLOW_IPS", "10.0.0.1")
+    monkeypatch.setattr(sys, "argv", ["serve", "--workers", "1"])
+    monkeypatch.setenv("TSKZ_WORKERS", "1")
+    monkeypatch.setenv("TSKZ_DB_SCHEMA_SYNC", "never")
+    serve.main()
+    assert calls[0]["proxy_headers"] is True and calls[0]["forwarded_allow_ips"] == "10.0.0.1"
+
+
+@pytest.mark.asyncio
+async def test_auth_endpoints_are_limited_per_ip(async_client, limits):
+    limits.setattr(settings, "RATE_LIMIT_AUTH_IP_BURST", 2)
+    limits.setattr(settings, "RATE_LIMIT_AUTH_IP_PER_SECOND", 0.01)
+    credentials = {"username": "nobody", "password": "wrong"}
+    statuses = [(await async_client.post("/token", data=credentials)).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_in_flight_limit_are_shed(async_client, make_auth_headers, monkeypatch):
+    headers = await make_auth_headers()
+    started, release = asyncio.Event(), asyncio.Event()
+    get_task_stats = tasks_api.get_task_stats
+
+    async def slow_stats(*args):
+        started.set()
+        await release.wait()
+        return await get_task_stats(*args)
+
+    monkeypatch.setattr(tasks_api, "get_task_stats", slow_stats)
+    monkeypatch.setattr(settings, "SHED_MAX_IN_FLIGHT", 1)
+    first = asyncio.create_task(async_client.get("/tasks/stats", headers=headers))
+    await started.wait()
+
+    res = await async_client.get("/tasks/", headers=headers)
+    assert res.status_code == 503 and res.headers["Retry-After"] == str(settings.SHED_RETRY_AFTER_SECONDS)
+    assert (await async_client.get("/health")).status_code == 200
+    release.set()
+    assert (await first).status_code == 200
+    assert (await async_client.get("/tasks/", headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_open_event_streams_do_not_count_as_in_flight(monkeypatch):
+    monkeypatch.setattr(settings, "SHED_MAX_IN_FLIGHT", 1)
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        streaming = scope["path"] == "/tasks/events"
+        content_type = b"text/event-stream" if streaming else b"application/json"
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        if streaming:
+            await release.wait()
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionMiddleware(app)
+
+    async def status_of(path):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {"type": "http", "method": "GET", "path": path, "headers": [], "client": ("127.0.0.1", 1)}
+        await middleware(scope, receive, send)
+        return messages[0]["status"]
+
+    streams = [asyncio.create_task(status_of("/tasks/events")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    assert middleware.in_flight == 0
+    assert await status_of("/tasks/") == 200
+    release.set()
+    assert await asyncio.gather(*streams) == [200] * 3
+    assert middleware.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_wait_monitor_averages_checkout_waits(tmp_path, monkeypatch):
+    engine = create_engine_for(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    monkeypatch.setattr(admission, "POOL_WAIT_WINDOW_SECONDS", 0)
+    monitor = admission.PoolWaitMonitor([engine])
+    (pool,) = monitor.pools
+    pool.checkouts += 4
+    pool.wait_seconds_total += 2.0
+    assert monitor.current() == pytest.approx(0.5)
+    monkeypatch.setattr(settings, "SHED_POOL_WAIT_SECONDS", 0.25)
+    monkeypatch.setattr(settings, "SHED_MAX_IN_FLIGHT", 0)
+    # A window without checkouts means nobody is waiting any more
+    assert admission.overloaded(1, monitor) is False
+    await engine.dispose()
@@ -1,3 +1,7 @@
+import os
+import time
+
+import jwt
 import pytest
 from httpx import AsyncClient
 
@@ -14,3 +18,44 @@ async def test_signup_and_login(async_client: AsyncClient):
     assert res.status_code == 200
     token = res.json()["access_token"]
     assert token
+
+
+@pytest.mark.asyncio
+async def test_login_is_shed_when_hash_pool_is_saturated(async_client, monkeypatch):
+    from app.core import security
+
+    res = await async_client.post("/signup", json={"username": "stormy", "password": "secret"})
+    assert res.status_code == 201
+
+    monkeypatch.setattr(security, "_pending", security.hash_workers + security.settings.PASSWORD_HASH_QUEUE_DEPTH)
+    res = await async_client.post("/token", data={"username": "stormy", "password": "secret"})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(async_client: AsyncClient):
+    await async_client.post("/signup", json={"username": "refresher", "password": "secret"})
+    res = await async_client.post("/token", data={"username": "refresher", "password": "secret"})
+    first_refresh = res.json()["refresh_token"]
+    assert first_refresh
+    # Access tokens are short-lived; the refresh token is what keeps a session going
+    claims = jwt.decode(res.json()["access_token"], options={"verify_signature": False})
+    assert claims["exp"] - time.time() <= 15 * 60
+
+    # A refresh token is not accepted as an access token
+    headers = {"Authorization": f"Bearer {first_refresh}", "X-API-Key": os.getenv("TSKZ_HTTP_API_KEY", "sample_key")}
+    res = await async_client.get("/tasks/", headers=headers)
+    assert res.status_code == 401
+
+    res = await async_client.post("/token/refresh", json={"refresh_token": first_refresh})
+    assert res.status_code == 200
+    second_refresh = res.json()["refresh_token"]
+    assert res.json()["access_token"]
+    assert second_refresh != first_refresh
+
+    # Reusing a consumed token fails and revokes the rest of the family
+    res = await async_client.post("/token/refresh", json={"refresh_token": first_refresh})
+    assert res.status_code == 401
+    res = await async_client.post("/token/refresh", json={"refresh_token": second_refresh})
+    assert res.status_code == 401
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.crud import task as crud
+from app.schemas.task import TaskBatchStatus
+
+
+@pytest.mark.asyncio
+async def test_batch_applies_operations_in_order(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    ids = []
+    for i in range(3):
+        res = await async_client.post(
+            "/tasks/", json={"title": f"Task {i}", "description": "Batch", "status": "pending"}, headers=headers
+        )
+        ids.append(res.json()["id"])
+
+    operations = [
+        {"op": "create", "task": {"title": "New", "description": "Created in batch"}},
+        {"op": "status", "id": ids[0], "status": "completed"},
+        {"op": "update", "id": ids[1], "task": {"title": "Renamed", "description": "Changed", "status": "pending"}},
+        {"op": "delete", "id": ids[2]},
+        {"op": "status", "id": ids[2], "status": "completed"},
+        {"op": "delete", "id": 999999},
+    ]
+    res = await async_client.post("/tasks/batch", json={"operations": operations}, headers=headers)
+    assert res.status_code == 200
+    results = res.json()["results"]
+    assert [r["status_code"] for r in results] == [201, 200, 200, 204, 404, 404]
+    assert results[0]["task"]["title"] == "New"
+    assert results[1]["task"]["status"] == "completed"
+
+    res = await async_client.get("/tasks/", headers=headers)
+    tasks = {task["id"]: task for task in res.json()}
+    assert len(tasks) == 3
+    assert ids[2] not in tasks
+    assert tasks[ids[0]]["status"] == "completed"
+    assert tasks[ids[1]]["title"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_batch_cannot_touch_other_users_tasks(async_client, make_auth_headers):
+    owner, intruder = await make_auth_headers(), await make_auth_headers()
+    res = await async_client.post(
+        "/tasks/", json={"title": "Mine", "description": "Private", "status": "pending"}, headers=owner
+    )
+    task_id = res.json()["id"]
+
+    res = await async_client.post(
+        "/tasks/batch", json={"operations": [{"op": "delete", "id": task_id}]}, headers=intruder
+    )
+    assert res.json()["results"][0]["status_code"] == 404
+
+    res = await async_client.get(f"/tasks/{task_id}", headers=owner)
+    assert res.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_status_ops_do_not_overwrite_concurrent_edits(file_db):
+    session, user_id = file_db
+    async with session() as db:
+        task_ids = [(await crud.create_task(db, user_id, {"title": "Old", "description": "d"})).id for _ in range(10)]
+
+    async def rename(task_id):
+        async with session() as db:
+            await crud.update_task(db, task_id, user_id, {"title": "Renamed"})
+
+    async def complete(task_id):
+        async with session() as db:
+            await crud.apply_task_batch(db, user_id, [TaskBatchStatus(op="status", id=task_id, status="completed")])
+
+    await asyncio.gather(*(write(task_id) for task_id in task_ids for write in (complete, rename)))
+    async with session() as db:
+        tasks = await crud.get_tasks_for_user(db, user_id)
+    assert {(task.title, task.status.value) for task in tasks} == {("Renamed", "completed")}
+
+
+@pytest.mark.asyncio
+async def test_status_ops_only_write_the_status(file_db):
+    session, user_id = file_db
+    async with session() as db:
+        task = await crud.create_task(db, user_id, {"title": "t", "description": "d"})
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            await crud.apply_task_batch(db, user_id, [TaskBatchStatus(op="status", id=task.id, status="completed")])
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+    (task_update,) = [statement for statement in statements if statement.startswith("UPDATE tasks")]
+    assert "title" not in task_update and "description" not in task_update
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.task import compact_task_tombstones
+
+
+async def _sync(async_client, headers, since=None, **params):
+    res = await async_client.get(
+        "/tasks/changes", params={**params, **({"since": since} if since else {})}, headers=headers
+    )
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_changes_since_cursor_include_updates_and_tombstones(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    ids = []
+    for i in range(3):
+        res = await async_client.post("/tasks/", json={"title": f"Task {i}", "description": "d"}, headers=headers)
+        ids.append(res.json()["id"])
+
+    snapshot = await _sync(async_client, headers)
+    assert [task["id"] for task in snapshot["tasks"]] == ids
+    assert snapshot["deleted"] == [] and snapshot["has_more"] is False
+
+    # Nothing changed: empty delta and the same cursor back
+    unchanged = await _sync(async_client, headers, snapshot["cursor"])
+    assert unchanged == {"tasks": [], "deleted": [], "cursor": snapshot["cursor"], "has_more": False}
+
+    await async_client.patch(f"/tasks/{ids[0]}", json={"status": "completed"}, headers=headers)
+    await async_client.delete(f"/tasks/{ids[1]}", headers=headers)
+    await async_client.post(
+        "/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "task": {"title": "Batch", "description": "d"}},
+                {"op": "delete", "id": ids[2]},
+            ]
+        },
+        headers=headers,
+    )
+
+    delta = await _sync(async_client, headers, snapshot["cursor"])
+    assert [task["id"] for task in delta["tasks"]][0] == ids[0]
+    assert delta["tasks"][0]["status"] == "completed"
+    assert [task["title"] for task in delta["tasks"]][1] == "Batch"
+    assert delta["deleted"] == [ids[1], ids[2]]
+
+    again = await _sync(async_client, headers, delta["cursor"])
+    assert again["tasks"] == [] and again["deleted"] == []
+
+
+@pytest.mark.asyncio
+async def test_changes_are_paged(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    for i in range(5):
+        await async_client.post("/tasks/", json={"title": f"Task {i}", "description": "d"}, headers=headers)
+
+    seen, cursor, has_more = [], None, True
+    while has_more:
+        page = await _sync(async_client, headers, cursor, limit=2)
+        seen += [task["id"] for task in page["tasks"]]
+        cursor, has_more = page["cursor"], page["has_more"]
+    assert len(seen) == len(set(seen)) == 5
+
+
+@pytest.mark.asyncio
+async def test_compacted_tombstones_expire_old_cursors(async_client, make_auth_headers, test_engine):
+    headers = await make_auth_headers()
+    kept = await async_client.post("/tasks/", json={"title": "kept", "description": "d"}, headers=headers)
+    res = await async_client.post("/tasks/", json={"title": "t", "description": "d"}, headers=headers)
+    cursor = (await _sync(async_client, headers))["cursor"]
+    await async_client.delete(f"/tasks/{res.json()['id']}", headers=headers)
+
+    async with AsyncSession(test_engine) as db:
+        assert await compact_task_tombstones(db, datetime.now(timezone.utc) + timedelta(days=1)) >= 1
+
+    res = await async_client.get("/tasks/changes", params={"since": cursor}, headers=headers)
+    assert res.status_code == 410
+    # A full sync hands out a cursor past the compaction mark, even when paged through tasks older than it
+    first = await _sync(async_client, headers, limit=1)
+    assert [task["id"] for task in first["tasks"]] == [kept.json()["id"]]
+    rest = await _sync(async_client, headers, first["cursor"])
+    assert rest["tasks"] == [] and rest["deleted"] == []
+
+    res = await async_client.get("/tasks/changes", params={"since": "nope"}, headers=headers)
+    assert res.status_code == 400
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1 import tasks as tasks_route
+
+
+@pytest.fixture
+def pool_counter(test_engine):
+    counts = {"checkout": 0, "checkin": 0}
+
+    def on_checkout(*args):
+        counts["checkout"] += 1
+
+    def on_checkin(*args):
+        counts["checkin"] += 1
+
+    event.listen(test_engine.sync_engine, "checkout", on_checkout)
+    event.listen(test_engine.sync_engine, "checkin", on_checkin)
+    yield counts
+    event.remove(test_engine.sync_engine, "checkout", on_checkout)
+    event.remove(test_engine.sync_engine, "checkin", on_checkin)
+
+
+@pytest.mark.asyncio
+async def test_bad_credentials_never_touch_the_pool(async_client, pool_counter):
+    api_key = os.getenv("TSKZ_HTTP_API_KEY", "sample_key")
+    res = await async_client.get("/tasks/", headers={"X-API-Key": "wrong", "Authorization": "Bearer x.y.z"})
+    assert res.status_code == 403
+    res = await async_client.get("/tasks/", headers={"X-API-Key": api_key, "Authorization": "Bearer x.y.z"})
+    assert res.status_code == 401
+    assert pool_counter["checkout"] == 0
+
+
+@pytest.mark.asyncio
+async def test_connection_is_returned_before_serialization(async_client, make_auth_headers, pool_counter, monkeypatch):
+    headers = await make_auth_headers()
+    await async_client.post("/tasks/", json={"title": "T", "description": "D", "status": "pending"}, headers=headers)
+
+    held_during_serialization = []
+    serialize = tasks_route.task_json_response
+
+    def spy(*args, **kwargs):
+        held_during_serialization.append(pool_counter["checkout"] - pool_counter["checkin"])
+        return serialize(*args, **kwargs)
+
+    monkeypatch.setattr(tasks_route, "task_json_response", spy)
+    res = await async_client.get("/tasks/", headers=headers)
+    assert res.status_code == 200
+    assert held_during_serialization == [0]
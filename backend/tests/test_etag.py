@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_get_task_conditional_request(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    res = await async_client.post(
+        "/tasks/", json={"title": "Poll me", "description": "ETag", "status": "pending"}, headers=headers
+    )
+    task_id = res.json()["id"]
+
+    res = await async_client.get(f"/tasks/{task_id}", headers=headers)
+    etag = res.headers["ETag"]
+
+    res = await async_client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    await async_client.patch(f"/tasks/{task_id}", json={"status": "completed"}, headers=headers)
+    res = await async_client.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_list_tasks_conditional_request(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    for i in range(2):
+        await async_client.post(
+            "/tasks/", json={"title": f"Task {i}", "description": "ETag", "status": "pending"}, headers=headers
+        )
+
+    res = await async_client.get("/tasks/", headers=headers)
+    etag = res.headers["ETag"]
+    res = await async_client.get("/tasks/", headers={**headers, "If-None-Match": f'W/{etag}, "other"'})
+    assert res.status_code == 304
+
+    # A different page of the same list has its own ETag
+    res = await async_client.get("/tasks/", params={"limit": 1}, headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+
+    await async_client.delete(f"/tasks/{res.json()[0]['id']}", headers=headers)
+    res = await async_client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert len(res.json()) == 1
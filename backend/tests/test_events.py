@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app.api.v1 import tasks as tasks_api
+from app.core import events
+from app.core.config import settings
+from app.core.events import RESET, TASK_CREATED, TASK_DELETED, TASK_UPDATED, InMemoryBroker
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    fresh = InMemoryBroker(queue_size=3, replay_size=3, max_users=2)
+    monkeypatch.setattr(events, "broker", fresh)
+    return fresh
+
+
+@pytest.mark.asyncio
+async def test_crud_paths_publish_events(async_client, make_auth_headers, broker):
+    headers = await make_auth_headers()
+    res = await async_client.post("/tasks/", json={"title": "t", "description": "d"}, headers=headers)
+    task_id = res.json()["id"]
+    await async_client.patch(f"/tasks/{task_id}", json={"status": "completed"}, headers=headers)
+    await async_client.delete(f"/tasks/{task_id}", headers=headers)
+    await async_client.post(
+        "/tasks/batch",
+        json={"operations": [{"op": "create", "task": {"title": "b", "description": "d"}}]},
+        headers=headers,
+    )
+
+    (history,) = broker._history.values()
+    published = [(event_type, json.loads(data)) for _, event_type, data in history.events]
+    assert [event_type for event_type, _ in published] == [TASK_UPDATED, TASK_DELETED, TASK_CREATED]
+    assert published[0][1]["status"] == "completed"
+    assert published[1][1] == {"id": task_id}
+    assert published[2][1]["title"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_broker_failure_does_not_fail_committed_writes(async_client, make_auth_headers, broker, monkeypatch):
+    async def publish(*args):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(broker, "publish", publish)
+    headers = await make_auth_headers()
+    res = await async_client.post("/tasks/", json={"title": "t", "description": "d"}, headers=headers)
+    assert res.status_code == 201
+    res = await async_client.patch(f"/tasks/{res.json()['id']}", json={"status": "completed"}, headers=headers)
+    assert res.status_code == 200
+    assert (await async_client.get("/tasks/stats", headers=headers)).json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_replay_and_reset(broker):
+    for i in range(5):
+        await broker.publish(1, TASK_CREATED, f'{{"id":{i}}}')
+    ids = [event[0] for event in broker._history[1].events]
+
+    _, missed = await broker.subscribe(1, ids[0])
+    assert [event[0] for event in missed] == ids[1:]
+    _, missed = await broker.subscribe(1, ids[-1])
+    assert missed == []
+    # Older than anything still buffered, or issued before this broker existed: the client must refetch
+    _, missed = await broker.subscribe(1, ids[0] - 2)
+    assert [event[1] for event in missed] == [RESET]
+    _, missed = await broker.subscribe(2, broker.first_id - 10)
+    assert [event[1] for event in missed] == [RESET]
+
+
+@pytest.mark.asyncio
+async def test_stream_heartbeat_delivery_and_backpressure(broker, monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_HEARTBEAT_SECONDS", 0.01)
+    stream = tasks_api._event_stream(7, None)
+
+    assert (await anext(stream)).startswith("retry:")
+    assert await anext(stream) == ": heartbeat\n\n"
+    assert broker.stats() == {"subscribers": 1}
+
+    await broker.publish(7, TASK_CREATED, '{"id":1}')
+    assert 'event: task.created\ndata: {"id":1}' in await anext(stream)
+
+    # A client that falls behind by more than the queue size gets what was queued, then the stream ends
+    for i in range(10):
+        await broker.publish(7, TASK_UPDATED, f'{{"id":{i}}}')
+    assert (await anext(stream)).count("event: task.updated") == 3
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert broker.stats() == {"subscribers": 0}
@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    for i in range(3):
+        await async_client.post(
+            "/tasks/", json={"title": f"Task {i}", "description": "Export", "status": "pending"}, headers=headers
+        )
+
+    res = await async_client.get("/tasks/export", headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Task 0", "Task 1", "Task 2"]
+
+
+@pytest.mark.asyncio
+async def test_export_csv_with_status_filter(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    await async_client.post(
+        "/tasks/", json={"title": "Open", "description": "a, b", "status": "pending"}, headers=headers
+    )
+    await async_client.post(
+        "/tasks/", json={"title": "Done", "description": "c", "status": "completed"}, headers=headers
+    )
+
+    res = await async_client.get("/tasks/export", params={"format": "csv", "status": "pending"}, headers=headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(rows) == 1
+    assert rows[0]["title"] == "Open"
+    assert rows[0]["description"] == "a, b"
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event
+
+
+@pytest.mark.asyncio
+async def test_sparse_fieldset_selects_only_those_columns(async_client, make_auth_headers, test_engine):
+    headers = await make_auth_headers()
+    for i in range(3):
+        await async_client.post("/tasks/", json={"title": f"t{i}", "description": "long " * 50}, headers=headers)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(test_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        res = await async_client.get(
+            "/tasks/", params={"fields": "status, id,title", "limit": 2, "sort": "-created_at"}, headers=headers
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", listener)
+    assert res.status_code == 200
+    assert [sorted(task) for task in res.json()] == [["id", "status", "title"]] * 2
+    assert [task["title"] for task in res.json()] == ["t2", "t1"]
+    (task_query,) = [statement for statement in statements if "FROM tasks" in statement and "LIMIT" in statement]
+    assert "description" not in task_query
+
+    # The cursor still works with the trimmed rows
+    res = await async_client.get(
+        "/tasks/",
+        params={"fields": "title", "sort": "-created_at", "after": res.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert res.json() == [{"title": "t0"}]
+
+    for fields in ("", "title,secret"):
+        res = await async_client.get("/tasks/", params={"fields": fields}, headers=headers)
+        assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_gzipped_when_accepted(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    for i in range(20):
+        await async_client.post("/tasks/", json={"title": f"t{i}", "description": "words " * 20}, headers=headers)
+
+    res = await async_client.get("/tasks/", headers={**headers, "Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in res.headers["Vary"]
+    assert int(res.headers["Content-Length"]) < len(res.content)
+    assert res.headers["ETag"].startswith('W/"')
+    res = await async_client.get(
+        "/tasks/", headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]}
+    )
+    assert res.status_code == 304
+
+    res = await async_client.get("/tasks/", headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in res.headers and not res.headers["ETag"].startswith("W/")
+    # Below the size threshold nothing is compressed
+    res = await async_client.get("/tasks/", params={"fields": "id", "limit": 1}, headers=headers)
+    assert "Content-Encoding" not in res.headers
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.api.v1 import tasks as tasks_api
+from app.core import idempotency
+
+
+def _with_key(headers, key):
+    return {**headers, "Idempotency-Key": key}
+
+
+@pytest.mark.asyncio
+async def test_retried_writes_replay_the_first_response(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    task = {"title": "Once", "description": "Only once"}
+
+    first = await async_client.post("/tasks/", json=task, headers=_with_key(headers, "create-1"))
+    idempotency.response_cache.clear()  # the retry is served from the table, as on another worker
+    retry = await async_client.post("/tasks/", json=task, headers=_with_key(headers, "create-1"))
+    cached = await async_client.post("/tasks/", json=task, headers=_with_key(headers, "create-1"))
+    assert first.status_code == retry.status_code == cached.status_code == 201
+    assert first.json() == retry.json() == cached.json()
+    assert "Idempotent-Replayed" not in first.headers and retry.headers["Idempotent-Replayed"] == "true"
+    assert (await async_client.get("/tasks/stats", headers=headers)).json()["total"] == 1
+
+    # Same key, different request
+    res = await async_client.post("/tasks/", json={**task, "title": "Twice"}, headers=_with_key(headers, "create-1"))
+    assert res.status_code == 422
+    # Keys are scoped per user
+    other = await make_auth_headers()
+    res = await async_client.post("/tasks/", json=task, headers=_with_key(other, "create-1"))
+    assert res.status_code == 201 and "Idempotent-Replayed" not in res.headers
+
+    task_id = first.json()["id"]
+    for _ in range(2):
+        res = await async_client.delete(f"/tasks/{task_id}", headers=_with_key(headers, "delete-1"))
+        assert res.status_code == 204
+    batch = {"operations": [{"op": "create", "task": task}]}
+    results = [
+        (await async_client.post("/tasks/batch", json=batch, headers=_with_key(headers, "batch-1"))).json()
+        for _ in range(2)
+    ]
+    assert results[0] == results[1] and results[0]["results"][0]["status_code"] == 201
+    assert (await async_client.get("/tasks/stats", headers=headers)).json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_write_releases_its_key(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    update = {"title": "t", "description": "d", "status": "pending"}
+    res = await async_client.put("/tasks/999999", json=update, headers=_with_key(headers, "put-1"))
+    assert res.status_code == 404
+    # Not stored: the retry runs again instead of replaying the 404
+    res = await async_client.put("/tasks/999999", json=update, headers=_with_key(headers, "put-1"))
+    assert res.status_code == 404 and "Idempotent-Replayed" not in res.headers
+
+
+@pytest.mark.asyncio
+async def test_request_failing_after_its_write_committed_is_not_run_again(async_client, make_auth_headers, monkeypatch):
+    headers = await make_auth_headers()
+    create_task = tasks_api.crud.create_task
+
+    async def create_then_fail(*args, **kwargs):
+        await create_task(*args, **kwargs)
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(tasks_api.crud, "create_task", create_then_fail)
+    task = {"title": "Committed", "description": "d"}
+    with pytest.raises(RuntimeError):
+        await async_client.post("/tasks/", json=task, headers=_with_key(headers, "lost-1"))
+    monkeypatch.setattr(tasks_api.crud, "create_task", create_task)
+
+    retry = await async_client.post("/tasks/", json=task, headers=_with_key(headers, "lost-1"))
+    assert retry.status_code == 201 and retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["title"] == "Committed"
+    assert (await async_client.get("/tasks/stats", headers=headers)).json()["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_waits_for_the_first_request(async_client, make_auth_headers, monkeypatch):
+    headers = await make_auth_headers()
+    started, release = asyncio.Event(), asyncio.Event()
+    create_task = tasks_api.crud.create_task
+
+    async def slow_create(*args, **kwargs):
+        started.set()
+        await release.wait()
+        return await create_task(*args, **kwargs)
+
+    monkeypatch.setattr(tasks_api.crud, "create_task", slow_create)
+    task = {"title": "Slow", "description": "d"}
+    first = asyncio.create_task(async_client.post("/tasks/", json=task, headers=_with_key(headers, "slow-1")))
+    await started.wait()
+    duplicate = asyncio.create_task(async_client.post("/tasks/", json=task, headers=_with_key(headers, "slow-1")))
+    await asyncio.sleep(0.1)
+    assert not duplicate.done()
+    release.set()
+
+    first, duplicate = await first, await duplicate
+    assert first.json() == duplicate.json() and duplicate.headers["Idempotent-Replayed"] == "true"
+    assert (await async_client.get("/tasks/stats", headers=headers)).json()["total"] == 1
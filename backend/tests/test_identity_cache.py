@@ -0,0 +1,32 @@
+import pytest
+
+from app.core.auth import identity_cache
+from app.core.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used_and_expires():
+    now = [0.0]
+    cache = LRUCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_hit_identity_cache(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    token = headers["Authorization"].split()[1]
+
+    await async_client.get("/tasks/", headers=headers)
+    hits = identity_cache.hits
+    res = await async_client.get("/tasks/", headers=headers)
+    assert res.status_code == 200
+    assert identity_cache.hits == hits + 1
+    assert identity_cache.get(token) is not None
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from app.core import events
+from app.core.config import settings
+from app.core.events import RESET, InMemoryBroker
+
+
+async def _import(async_client, headers, filename, content, **params):
+    return await async_client.post("/tasks/import", files={"file": (filename, content)}, params=params, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_csv_import_in_chunks_reports_rejected_rows(async_client, make_auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(events, "broker", InMemoryBroker())
+    headers = await make_auth_headers()
+    content = (
+        "id,title,description,status,created_at\r\n"
+        '1,Write,"Quoted ""multi\nline"" text",completed,2024-01-01\r\n'
+        "2,Read,Plain,,\r\n"
+        "3,Empty description,,pending,\r\n"
+        "4,Run,Bad status,someday,\r\n"
+        "5,Swim,Last row,pending,\r\n"
+    )
+    res = await _import(async_client, headers, "tasks.csv", content)
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["created"], body["rejected"], body["errors_truncated"]) == (4, 1, False)
+    assert [error["row"] for error in body["errors"]] == [4]
+    assert body["errors"][0]["errors"][0]["loc"] == ["status"]
+
+    tasks = (await async_client.get("/tasks/", params={"limit": 10}, headers=headers)).json()
+    assert [(task["title"], task["description"], task["status"]) for task in tasks] == [
+        ("Write", 'Quoted "multi\nline" text', "completed"),
+        ("Read", "Plain", "pending"),
+        ("Empty description", "", "pending"),
+        ("Swim", "Last row", "pending"),
+    ]
+    assert (await async_client.get("/tasks/stats", headers=headers)).json() == {
+        "pending": 3,
+        "completed": 1,
+        "total": 4,
+    }
+    changes = (await async_client.get("/tasks/changes", headers=headers)).json()
+    assert len(changes["tasks"]) == 4
+    # One reset for the whole import rather than an event per task
+    (history,) = events.broker._history.values()
+    assert [event[1] for event in history.events] == [RESET]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_import_and_bad_uploads(async_client, make_auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_IMPORT_MAX_ERRORS", 1)
+    headers = await make_auth_headers()
+    lines = [
+        json.dumps({"title": "a", "description": "b"}),
+        "",
+        "{not json",
+        json.dumps({"title": "c"}),
+        json.dumps({"title": "d", "description": "e", "status": "completed"}),
+    ]
+    res = await _import(async_client, headers, "tasks.ndjson", "\n".join(lines))
+    body = res.json()
+    assert (body["created"], body["rejected"], body["errors_truncated"]) == (2, 2, True)
+    assert body["errors"][0]["row"] == 3
+    assert (await async_client.get("/tasks/stats", headers=headers)).json() == {
+        "pending": 1,
+        "completed": 1,
+        "total": 2,
+    }
+
+    res = await _import(async_client, headers, "tasks.txt", "title,status\r\nx,pending\r\n", format="csv")
+    assert res.status_code == 400 and "description" in res.json()["detail"]
+    res = await _import(async_client, headers, "tasks.ndjson", b"\xff\xfe\x00")
+    assert res.status_code == 400
@@ -0,0 +1,39 @@
+import pytest
+
+from app.core import metrics
+from app.core.metrics import Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, (("route", "/x"),))
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/x"} 3' in lines
+
+
+@pytest.fixture
+def instrumented_engine(test_engine):
+    uninstrument = metrics.instrument_engine(test_engine, "test")
+    yield test_engine
+    # The engine is shared by the whole session; don't leave the timing listeners on it
+    uninstrument()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_routes_and_queries(async_client, make_auth_headers, instrumented_engine):
+    headers = await make_auth_headers()
+    await async_client.get("/tasks/", headers=headers)
+    await async_client.get("/tasks/12345", headers=headers)
+
+    res = await async_client.get("/metrics")
+    assert res.status_code == 200
+    body = res.text
+    assert 'taskaza_http_request_duration_seconds_count{method="GET",route="/tasks/",status="200"}' in body
+    assert 'route="/tasks/{task_id}",status="404"' in body
+    assert 'taskaza_db_query_duration_seconds_count{engine="test",statement="SELECT"}' in body
+    assert 'taskaza_password_hash_duration_seconds_count{operation="verify_password"}' in body
+    assert 'taskaza_db_pool_checked_out{engine="primary"}' in body
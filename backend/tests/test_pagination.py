@@ -0,0 +1,82 @@
+import pytest
+
+from app.core.pagination import encode_cursor
+
+
+async def _create_tasks(async_client, headers, count, status="pending"):
+    for i in range(count):
+        await async_client.post(
+            "/tasks/", json={"title": f"Task {i}", "description": "Paged", "status": status}, headers=headers
+        )
+
+
+@pytest.mark.asyncio
+async def test_keyset_pagination_walks_all_pages(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    await _create_tasks(async_client, headers, 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"after": cursor} if cursor else {})}
+        res = await async_client.get("/tasks/", params=params, headers=headers)
+        assert res.status_code == 200
+        assert len(res.json()) <= 2
+        seen.extend(task["id"] for task in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+@pytest.mark.asyncio
+async def test_descending_sort_and_status_filter(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    await _create_tasks(async_client, headers, 3)
+    await _create_tasks(async_client, headers, 2, status="completed")
+
+    res = await async_client.get("/tasks/", params={"sort": "-created_at", "limit": 1}, headers=headers)
+    first_page = res.json()
+    res = await async_client.get(
+        "/tasks/", params={"sort": "-created_at", "after": res.headers["X-Next-Cursor"]}, headers=headers
+    )
+    ids = [first_page[0]["id"]] + [task["id"] for task in res.json()]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 5
+
+    res = await async_client.get("/tasks/", params={"status": "completed"}, headers=headers)
+    assert [task["status"] for task in res.json()] == ["completed", "completed"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    await _create_tasks(async_client, headers, 2)
+
+    res = await async_client.get("/tasks/", params={"after": "not-a-cursor"}, headers=headers)
+    assert res.status_code == 400
+
+    res = await async_client.get("/tasks/", params={"limit": 1}, headers=headers)
+    res = await async_client.get(
+        "/tasks/", params={"after": res.headers["X-Next-Cursor"], "sort": "-id"}, headers=headers
+    )
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/tasks/", {"sort": "created_at", "after": encode_cursor("created_at", 5, 1)}),
+        ("/tasks/", {"sort": "-updated_at", "after": encode_cursor("-updated_at", [1], 1)}),
+        ("/tasks/", {"sort": "created_at", "after": encode_cursor("created_at", "yesterday", 1)}),
+        ("/tasks/search", {"q": "x", "after": encode_cursor("rank", "2024-01-01T00:00:00", 1)}),
+        ("/tasks/search", {"q": "x", "after": encode_cursor("rank", None, 1)}),
+        ("/tasks/changes", {"since": encode_cursor("changes", [1, "2"], 1)}),
+    ],
+)
+async def test_cursor_without_a_valid_sort_key_is_rejected(async_client, make_auth_headers, path, params):
+    headers = await make_auth_headers()
+    res = await async_client.get(path, params=params, headers=headers)
+    assert res.status_code == 400
@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import dependencies, shared
+from app.db.session import Base, make_sessionmaker
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_except_right_after_a_write(async_client, make_auth_headers, tmp_path, monkeypatch):
+    # The replica is a second, empty SQLite file that never receives the primary's writes
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with replica.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(dependencies.db_session, "async_read_session", make_sessionmaker(replica))
+
+    # The new user only exists on the primary; authentication falls back to it
+    headers = await make_auth_headers()
+    res = await async_client.post(
+        "/tasks/", json={"title": "Fresh", "description": "Replica lag", "status": "pending"}, headers=headers
+    )
+    assert res.status_code == 201
+
+    # Within the read-your-writes window the primary serves the read
+    res = await async_client.get("/tasks/", headers=headers)
+    assert [task["title"] for task in res.json()] == ["Fresh"]
+
+    # Once the window is over, reads go to the (lagging) replica
+    monkeypatch.setattr(shared, "store", shared.MemoryStore())
+    res = await async_client.get("/tasks/", headers=headers)
+    assert res.json() == []
+
+    await replica.dispose()
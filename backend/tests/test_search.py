@@ -0,0 +1,110 @@
+import pytest
+from sqlalchemy import event, text
+
+from app.crud import task as crud
+from app.db.search import FTS_TABLE, create_search_index
+
+
+async def _create(async_client, headers, title, description="", status="pending"):
+    res = await async_client.post(
+        "/tasks/", json={"title": title, "description": description, "status": status}, headers=headers
+    )
+    return res.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_title_matches_first(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    in_description = await _create(async_client, headers, "Weekly chores", "Pick up groceries on the way home")
+    in_title = await _create(async_client, headers, "Groceries", "Milk and bread")
+    await _create(async_client, headers, "Finish report", "Quarterly numbers")
+
+    res = await async_client.get("/tasks/search", params={"q": "grocery"}, headers=headers)
+    assert res.status_code == 200
+    assert [task["id"] for task in res.json()] == [in_title, in_description]
+
+
+@pytest.mark.asyncio
+async def test_search_follows_updates_deletes_and_owner(async_client, make_auth_headers):
+    headers, other_headers = await make_auth_headers(), await make_auth_headers()
+    task_id = await _create(async_client, headers, "Call plumber", "Kitchen sink")
+    await _create(async_client, other_headers, "Call plumber", "Someone else's sink")
+
+    res = await async_client.get("/tasks/search", params={"q": "plumber"}, headers=headers)
+    assert [task["id"] for task in res.json()] == [task_id]
+
+    await async_client.put(
+        f"/tasks/{task_id}", json={"title": "Call electrician", "description": "Kitchen lights"}, headers=headers
+    )
+    res = await async_client.get("/tasks/search", params={"q": "plumber"}, headers=headers)
+    assert res.json() == []
+    res = await async_client.get("/tasks/search", params={"q": "electrician kitchen"}, headers=headers)
+    assert [task["id"] for task in res.json()] == [task_id]
+
+    await async_client.delete(f"/tasks/{task_id}", headers=headers)
+    res = await async_client.get("/tasks/search", params={"q": "electrician"}, headers=headers)
+    assert res.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_pagination_and_query_syntax(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    for i in range(5):
+        await _create(
+            async_client, headers, f"Invoice {i}", "Send to client", status="completed" if i % 2 else "pending"
+        )
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "invoice", "limit": 2, **({"after": cursor} if cursor else {})}
+        res = await async_client.get("/tasks/search", params=params, headers=headers)
+        seen.extend(task["id"] for task in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 5
+
+    res = await async_client.get("/tasks/search", params={"q": "invoice", "status": "completed"}, headers=headers)
+    assert len(res.json()) == 2
+
+    # FTS operators and punctuation in user input are treated as plain words, not query syntax
+    res = await async_client.get("/tasks/search", params={"q": 'invoice" OR NEAR(*'}, headers=headers)
+    assert res.status_code == 200
+    res = await async_client.get("/tasks/search", params={"q": "!!"}, headers=headers)
+    assert res.json() == []
+    res = await async_client.get("/tasks/search", params={"q": "invoice", "after": "garbage"}, headers=headers)
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_match_is_scoped_to_the_owner(file_db):
+    session, user_id = file_db
+    async with session() as db:
+        await crud.create_task(db, user_id, {"title": "Pay rent", "description": "Before the 1st"})
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, *args: statements.append(parameters)  # noqa: E731
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            assert len(await crud.search_tasks(db, user_id, ["rent"], limit=10)) == 1
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+        # The owner is part of the MATCH itself, and only text columns match the search terms
+        assert any(f'user_id : "{user_id}"' in str(parameters) for parameters in statements)
+        assert await crud.search_tasks(db, user_id, [str(user_id)], limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_index_without_owner_column_is_rebuilt(file_db):
+    session, user_id = file_db
+    async with session() as db:
+        task = await crud.create_task(db, user_id, {"title": "Water plants", "description": "Balcony"})
+        connection = await db.connection()
+        await connection.execute(text(f"DROP TABLE {FTS_TABLE}"))
+        await connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, description, content='tasks', content_rowid='id')"
+            )
+        )
+        await connection.run_sync(create_search_index)
+        await db.commit()
+        assert [found.id for found, _ in await crud.search_tasks(db, user_id, ["plants"], limit=10)] == [task.id]
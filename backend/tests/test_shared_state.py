@@ -0,0 +1,139 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.core.config import Settings
+from app.core.events import RESET, TASK_CREATED, SQLiteBroker
+from app.core.shared import MemoryStore, SQLiteStore
+from app.main import app, lifespan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_store_get_set_incr_and_expiry(backend, tmp_path):
+    store = MemoryStore() if backend == "memory" else SQLiteStore(str(tmp_path / "shared.db"))
+
+    await store.set("a", "1", ttl=60)
+    assert await store.get("a") == "1"
+    await store.set("gone", "1", ttl=-1)
+    assert await store.get("gone") is None
+    await store.delete("a")
+    assert await store.get("a") is None
+
+    assert await store.incr("hits", 1, ttl=60) == 1
+    assert await store.incr("hits", 2, ttl=60) == 3
+    # An expired counter starts again from zero
+    assert await store.incr("stale", 5, ttl=-1) == 5
+    assert await store.incr("stale", 1, ttl=60) == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_is_shared_between_processes(tmp_path):
+    # Two stores on one file stand in for two workers
+    first, second = SQLiteStore(str(tmp_path / "shared.db")), SQLiteStore(str(tmp_path / "shared.db"))
+    await first.set("recent-writer:1", "1", ttl=60)
+    assert await second.get("recent-writer:1") == "1"
+    await first.incr("n", 1, ttl=60)
+    assert await second.incr("n", 1, ttl=60) == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_store_waits_for_locks_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "shared.db")
+    store = SQLiteStore(path)
+    await store.set("warm", "1", ttl=60)
+    # Another worker holds the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        take = asyncio.create_task(store.take("ratelimit:user:1", rate=1, capacity=5))
+        await asyncio.sleep(0.1)
+        # The loop kept running while the store waited on the lock
+        assert not take.done()
+    finally:
+        other.execute("COMMIT")
+        other.close()
+    assert await take == (True, pytest.approx(4, abs=0.01))
+
+
+def test_multi_worker_settings_are_validated(monkeypatch):
+    monkeypatch.delenv("TSKZ_JWT_SECRET_KEY", raising=False)
+    assert Settings(_env_file=None, WORKERS=1).multi_worker_problems() == []
+    problems = Settings(_env_file=None, WORKERS=4).multi_worker_problems()
+    assert len(problems) == 3 and "JWT_SECRET_KEY" in problems[0]
+    shared = Settings(
+        _env_file=None, WORKERS=4, JWT_SECRET_KEY="fixed", SHARED_STATE_BACKEND="sqlite", EVENTS_BACKEND="sqlite"
+    )
+    assert shared.multi_worker_problems() == []
+
+
+@pytest.mark.asyncio
+async def test_lifespan_refuses_per_process_secret_with_workers(monkeypatch):
+    from app.main import settings
+
+    monkeypatch.setattr(settings, "WORKERS", 2)
+    monkeypatch.setattr(settings, "__pydantic_fields_set__", settings.model_fields_set - {"JWT_SECRET_KEY"})
+    with pytest.raises(RuntimeError, match="JWT_SECRET_KEY"):
+        async with lifespan(app):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_sqlite_broker_delivers_across_workers_and_replays(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer = SQLiteBroker(path, queue_size=10, replay_size=3, retention=600, poll_interval=0.01)
+    reader = SQLiteBroker(path, queue_size=10, replay_size=3, retention=600, poll_interval=0.01)
+
+    subscription, missed = await reader.subscribe(1)
+    assert missed == []
+    await writer.publish(1, TASK_CREATED, '{"id":1}')
+    await writer.publish(2, TASK_CREATED, '{"id":2}')
+    batch = await subscription.next_batch(timeout=1)
+    assert [(event[1], event[2]) for event in batch] == [(TASK_CREATED, '{"id":1}')]
+    first_id = batch[0][0]
+
+    for i in range(3):
+        await writer.publish(1, TASK_CREATED, f'{{"id":{i + 10}}}')
+    _, missed = await reader.subscribe(1, first_id)
+    assert [event[2] for event in missed] == ['{"id":10}', '{"id":11}', '{"id":12}']
+    # More than replay_size events behind, ahead of the log, or pruned away: the client must refetch
+    _, missed = await reader.subscribe(1, first_id - 1)
+    assert [event[1] for event in missed] == [RESET]
+    _, missed = await reader.subscribe(1, first_id + 100)
+    assert [event[1] for event in missed] == [RESET]
+    writer.retention = -1
+    await writer.prune()
+    _, missed = await reader.subscribe(1, first_id)
+    assert [event[1] for event in missed] == [RESET]
+
+    for sub in list(reader._subscribers.get(1, ())) + list(reader._subscribers.get(2, ())):
+        reader.unsubscribe(sub)
+    await asyncio.sleep(0.05)
+    assert reader._poller is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_broker_poller_survives_errors(tmp_path, monkeypatch):
+    broker = SQLiteBroker(str(tmp_path / "shared.db"), queue_size=10, retention=600, poll_interval=0.01)
+    subscription, _ = await broker.subscribe(1)
+    poll = broker.poll
+    failures = []
+
+    async def flaky_poll():
+        if not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError("database is locked")
+        await poll()
+
+    monkeypatch.setattr(broker, "poll", flaky_poll)
+    await broker.publish(1, TASK_CREATED, '{"id":1}')
+    assert [event[2] for event in await subscription.next_batch(timeout=1)] == ['{"id":1}']
+    assert failures
+
+    # A poller that died anyway is restarted from where it was, not from the newest event
+    broker._poller.cancel()
+    await asyncio.sleep(0.02)
+    await broker.publish(1, TASK_CREATED, '{"id":2}')
+    await broker.subscribe(2)
+    assert [event[2] for event in await subscription.next_batch(timeout=1)] == ['{"id":2}']
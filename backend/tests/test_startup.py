@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.db.schema import ensure_schema, schema_fingerprint, stored_fingerprint
+from app.main import app, lifespan
+
+
+@pytest.mark.asyncio
+async def test_schema_sync_is_skipped_when_fingerprint_matches(test_engine):
+    async with test_engine.begin() as conn:
+        assert await conn.run_sync(ensure_schema, "always") is True
+        fingerprint = await conn.run_sync(lambda sync_conn: schema_fingerprint(sync_conn.dialect))
+        assert await conn.run_sync(stored_fingerprint) == fingerprint
+        assert await conn.run_sync(ensure_schema, "auto") is False
+        assert await conn.run_sync(ensure_schema, "never") is False
+
+
+@pytest.mark.asyncio
+async def test_lifespan_serves_cached_openapi(tmp_path, monkeypatch):
+    cached = {"openapi": "3.1.0", "info": {"title": "cached", "version": "0"}, "paths": {}}
+    path = tmp_path / "openapi.json"
+    path.write_text(json.dumps(cached))
+    monkeypatch.setattr(settings, "OPENAPI_CACHE_PATH", str(path))
+    monkeypatch.setattr(settings, "DB_SCHEMA_SYNC", "never")
+    monkeypatch.setattr(app, "openapi_schema", None)
+
+    async with lifespan(app):
+        assert app.openapi() == cached
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import task as crud
+from app.crud.task_stats import check_task_stats, get_task_stats, rebuild_task_stats
+from app.models.task_stats import TaskStats
+from app.schemas.task import TaskBatchStatus
+
+
+async def _stats(async_client, headers):
+    res = await async_client.get("/tasks/stats", headers=headers)
+    assert res.status_code == 200
+    return res.json()
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_every_kind_of_write(async_client, make_auth_headers):
+    headers = await make_auth_headers()
+    assert await _stats(async_client, headers) == {"pending": 0, "completed": 0, "total": 0}
+
+    ids = []
+    for status in ("pending", "pending", "completed"):
+        res = await async_client.post(
+            "/tasks/", json={"title": "t", "description": "d", "status": status}, headers=headers
+        )
+        ids.append(res.json()["id"])
+    assert await _stats(async_client, headers) == {"pending": 2, "completed": 1, "total": 3}
+
+    await async_client.patch(f"/tasks/{ids[0]}", json={"status": "completed"}, headers=headers)
+    # A full update that keeps the status leaves the counters alone
+    await async_client.put(
+        f"/tasks/{ids[2]}", json={"title": "t2", "description": "d2", "status": "completed"}, headers=headers
+    )
+    assert await _stats(async_client, headers) == {"pending": 1, "completed": 2, "total": 3}
+
+    await async_client.delete(f"/tasks/{ids[1]}", headers=headers)
+    await async_client.patch("/tasks/999999", json={"status": "completed"}, headers=headers)
+    assert await _stats(async_client, headers) == {"pending": 0, "completed": 2, "total": 2}
+
+    await async_client.post(
+        "/tasks/batch",
+        json={
+            "operations": [
+                {"op": "create", "task": {"title": "a", "description": "b"}},
+                {"op": "status", "id": ids[0], "status": "pending"},
+                {"op": "status", "id": ids[0], "status": "completed"},
+                {"op": "delete", "id": ids[2]},
+                {"op": "delete", "id": ids[2]},
+            ]
+        },
+        headers=headers,
+    )
+    assert await _stats(async_client, headers) == {"pending": 1, "completed": 1, "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_check_and_rebuild(async_client, make_auth_headers, test_engine):
+    headers = await make_auth_headers()
+    await async_client.post("/tasks/", json={"title": "t", "description": "d"}, headers=headers)
+
+    async with AsyncSession(test_engine) as db:
+        await rebuild_task_stats(db)
+        assert await check_task_stats(db) == []
+
+        # Users without a counters row are reported, and their stats are still counted on read
+        await db.execute(delete(TaskStats))
+        await db.commit()
+        assert len(await check_task_stats(db)) > 0
+        assert await _stats(async_client, headers) == {"pending": 1, "completed": 0, "total": 1}
+
+        await rebuild_task_stats(db)
+        assert await check_task_stats(db) == []
+    assert await _stats(async_client, headers) == {"pending": 1, "completed": 0, "total": 1}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("via", ["patch", "batch"])
+async def test_concurrent_status_changes_count_once(file_db, via):
+    session, user_id = file_db
+    async with session() as db:
+        task_ids = [(await crud.create_task(db, user_id, {"title": "t", "description": "d"})).id for _ in range(20)]
+
+    async def complete(task_id):
+        async with session() as db:
+            if via == "patch":
+                await crud.update_task_status(db, task_id, user_id, "completed")
+            else:
+                operation = TaskBatchStatus(op="status", id=task_id, status="completed")
+                await crud.apply_task_batch(db, user_id, [operation])
+
+    await asyncio.gather(*(complete(task_id) for task_id in task_ids for _ in range(4)))
+    async with session() as db:
+        assert await get_task_stats(db, user_id) == {"pending": 0, "completed": 20}
+        assert await check_task_stats(db) == []
@@ -85,3 +85,14 @@ async def test_delete_task(async_client, auth_headers, created_task):
     # Ensure task is gone
     res = await async_client.get(f"/tasks/{task_id}", headers=auth_headers)
     assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_fast_json_matches_response_model(async_client, auth_headers, created_task, monkeypatch):
+    from app.core.config import settings
+
+    fast = await async_client.get("/tasks/", headers=auth_headers)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    standard = await async_client.get("/tasks/", headers=auth_headers)
+    assert fast.json() == standard.json()
+    assert fast.headers["ETag"] == standard.headers["ETag"]